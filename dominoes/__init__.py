@@ -0,0 +1,5 @@
+# Dominoes: an input and output free game engine (tiles, board, engine), the computer strategies built on it and the
+# tools around them. Importing the package or any of its modules has no side effects; the console game and every tool
+# run from their main functions, all reachable through python -m dominoes (see __main__.py). NumPy is only needed by
+# the batch simulator and the weight tuner, and only imported when one of them runs or a record file is read into
+# arrays.
@@ -0,0 +1,44 @@
+import importlib
+import sys
+
+# The commands of the dominoes entry point and the module and function that run each of them. A module is only
+# imported when its command runs, so playing a game never loads the tools (or NumPy, which only batch and tune need).
+COMMANDS = {
+    'play': ('console', 'main'),
+    'table': ('table', 'main'),
+    'serve': ('server', 'serve_main'),
+    'load': ('server', 'load_main'),
+    'tournament': ('tournament', 'main'),
+    'abtest': ('abtest', 'main'),
+    'batch': ('batch', 'main'),
+    'book': ('openings', 'main'),
+    'tune': ('tuning', 'main'),
+    'bench': ('benchmarks', 'main'),
+}
+
+
+def usage():
+    return (f"usage: dominoes [{'|'.join(COMMANDS)}] [arguments]\n\n"
+            f"Without a command a console game is played. Run dominoes <command> --help for the arguments of a "
+            f"command.")
+
+
+# Run a command with the rest of the arguments. A game against the computer is the default command, so dominoes on
+# its own (or with only game options) plays the console game. Returns the command's exit status.
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else list(argv)
+    if argv and argv[0] in ('-h', '--help'):
+        print(usage())
+        return 0
+    command = 'play'
+    if argv and argv[0] in COMMANDS:
+        command = argv.pop(0)
+    module_name, function_name = COMMANDS[command]
+    module = importlib.import_module(f'.{module_name}', __package__)
+    # argparse names the program after sys.argv[0], so the usage of a command reads "dominoes <command>".
+    sys.argv[0] = f'dominoes {command}'
+    return getattr(module, function_name)(argv)
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
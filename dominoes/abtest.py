@@ -0,0 +1,205 @@
+import argparse
+import math
+import os
+import random
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from statistics import NormalDist
+
+from .engine import COMPUTER, COMPUTER_WINS, PLAYER, PLAYER_WINS, GameState, shuffle_domino_set
+from .strategies import STRATEGIES
+from .tiles import DOUBLE_SIX
+from .tournament import game_seed, play_game
+
+A_BETTER = 'A is better'
+NOT_BETTER = 'A is not better'
+
+# A pair is two games on the same deal with the seats swapped, so luck of the deal cancels out. Strategy A scores 1
+# for a win and 0.5 for a draw in each game, so a pair scores 0, 0.5, 1, 1.5 or 2; a pair's index in the counts list
+# is twice its score. Games abandoned after max_turns count as draws.
+PAIR_SCORES = (0.0, 0.5, 1.0, 1.5, 2.0)
+
+
+# Play pairs start to stop - 1 and return how many pairs ended with each score. Both games of a pair use the same
+# deal and give the strategies the same random numbers.
+def play_pairs(strategy_a, strategy_b, seed, start, stop, max_turns=1000):
+    make_a = STRATEGIES[strategy_a]
+    make_b = STRATEGIES[strategy_b]
+    counts = [0] * len(PAIR_SCORES)
+
+    for pair in range(start, stop):
+        rng = random.Random(game_seed(seed, pair))
+        deal = list(range(DOUBLE_SIX.size))
+        shuffle_domino_set(deal, rng)
+        strategy_seed = rng.getrandbits(64)
+
+        points = 0
+        for a_seat, b_seat, a_wins in ((PLAYER, COMPUTER, PLAYER_WINS), (COMPUTER, PLAYER, COMPUTER_WINS)):
+            seats = {a_seat: make_a(random.Random(strategy_seed)), b_seat: make_b(random.Random(strategy_seed))}
+            state, _ = play_game(GameState.from_deal(deal), seats, max_turns)
+            if state.status == a_wins:
+                points += 2
+            elif state.status not in (PLAYER_WINS, COMPUTER_WINS):
+                points += 1
+        counts[points] += 1
+    return counts
+
+
+# The running statistics of a comparison. The score is strategy A's points per game, so 0.5 means the strategies are
+# even. The test is a sequential probability ratio test of score p0 against score p1 on the pair results, using the
+# normal approximation of the generalized SPRT: the log likelihood ratio is
+#     pairs * (p1 - p0) * (2 * mean - p0 - p1) / (2 * variance)
+# with the mean and variance of the per game score of a pair. It accepts p1 (A is better) once the ratio reaches
+# log((1 - beta) / alpha) and p0 once it falls to log(beta / (1 - alpha)), with error rates alpha and beta.
+#
+# When every pair so far scored the same there is no spread to measure, so the test works with the largest variance
+# the per game score of a pair can have at score p0, p0 * (1 - p0) / 2, instead. Two strategies that always tie then
+# lead to p0 after a few hundred pairs rather than never reaching a verdict.
+class SequentialTest:
+
+    def __init__(self, p0=0.5, p1=0.55, alpha=0.05, beta=0.05, confidence=0.95):
+        if not 0 < p0 < p1 < 1:
+            raise ValueError("The scores must satisfy 0 < p0 < p1 < 1.")
+        self.p0 = p0
+        self.p1 = p1
+        self.lower_bound = math.log(beta / (1 - alpha))
+        self.upper_bound = math.log((1 - beta) / alpha)
+        self.z = NormalDist().inv_cdf(0.5 + confidence / 2)
+        self.confidence = confidence
+        self.counts = [0] * len(PAIR_SCORES)
+
+    def update(self, counts):
+        for i, count in enumerate(counts):
+            self.counts[i] += count
+        return self
+
+    def pairs(self):
+        return sum(self.counts)
+
+    def mean(self):
+        pairs = self.pairs()
+        if not pairs:
+            return 0.5
+        return sum(count * score / 2 for count, score in zip(self.counts, PAIR_SCORES)) / pairs
+
+    # The variance of the per game score of a pair.
+    def variance(self):
+        pairs = self.pairs()
+        if pairs < 2:
+            return 0.0
+        mean = self.mean()
+        return sum(count * (score / 2 - mean) ** 2 for count, score in zip(self.counts, PAIR_SCORES)) / (pairs - 1)
+
+    # The variance the test and the interval work with.
+    def test_variance(self):
+        variance = self.variance()
+        if variance == 0.0:
+            return self.p0 * (1 - self.p0) / 2
+        return variance
+
+    def interval(self):
+        pairs = self.pairs()
+        if pairs < 2:
+            return 0.0, 1.0
+        half_width = self.z * math.sqrt(self.test_variance() / pairs)
+        return self.mean() - half_width, self.mean() + half_width
+
+    def llr(self):
+        if self.pairs() < 2:
+            return 0.0
+        return self.pairs() * (self.p1 - self.p0) * (2 * self.mean() - self.p0 - self.p1) / (2 * self.test_variance())
+
+    # With method 'sprt' the verdict comes from the likelihood ratio. With method 'ci' A is better as soon as the
+    # confidence interval of the score lies above 0.5, and not better as soon as it lies below p1; that is simpler to
+    # read, but looking after every chunk makes its real error rate higher than 1 - confidence. Returns None while
+    # undecided.
+    def verdict(self, method='sprt'):
+        if method == 'sprt':
+            llr = self.llr()
+            if llr >= self.upper_bound:
+                return A_BETTER
+            if llr <= self.lower_bound:
+                return NOT_BETTER
+            return None
+        if self.pairs() < 2:
+            return None
+        low, high = self.interval()
+        if low > 0.5:
+            return A_BETTER
+        if high < self.p1:
+            return NOT_BETTER
+        return None
+
+    def summary(self):
+        low, high = self.interval()
+        return (f"pairs: {self.pairs()}  games: {2 * self.pairs()}  score: {self.mean():.4f}  "
+                f"{self.confidence:.0%} interval: [{low:.4f}, {high:.4f}]  "
+                f"LLR: {self.llr():.2f} [{self.lower_bound:.2f}, {self.upper_bound:.2f}]")
+
+
+# Play pairs in chunks until the test reaches a verdict or max_pairs have been played, yielding the test after every
+# chunk. Only a few chunks per worker are in flight at a time, so little work is wasted when the test stops early;
+# chunks are counted in the order they finish.
+def iter_comparison(strategy_a, strategy_b, test, method='sprt', max_pairs=100000, seed=0, workers=None,
+                    chunk_size=50, max_turns=1000):
+    for name in (strategy_a, strategy_b):
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {name!r}")
+
+    starts = iter(range(0, max_pairs, chunk_size))
+    if workers == 1:
+        for start in starts:
+            test.update(play_pairs(strategy_a, strategy_b, seed, start, min(start + chunk_size, max_pairs), max_turns))
+            yield test
+            if test.verdict(method) is not None:
+                return
+        return
+
+    in_flight = 2 * (workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        pending = set()
+        while True:
+            for start in starts:
+                pending.add(executor.submit(play_pairs, strategy_a, strategy_b, seed, start,
+                                            min(start + chunk_size, max_pairs), max_turns))
+                if len(pending) >= in_flight:
+                    break
+            if not pending:
+                return
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                test.update(future.result())
+            yield test
+            if test.verdict(method) is not None:
+                for future in pending:
+                    future.cancel()
+                return
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare two strategies on paired games until a sequential test "
+                                                 "decides whether strategy A is better than strategy B.")
+    parser.add_argument('strategy_a', choices=sorted(STRATEGIES))
+    parser.add_argument('strategy_b', choices=sorted(STRATEGIES))
+    parser.add_argument('--method', choices=('sprt', 'ci'), default='sprt')
+    parser.add_argument('--p0', type=float, default=0.5, help="score of A under the null hypothesis")
+    parser.add_argument('--p1', type=float, default=0.55, help="score of A under the alternative hypothesis")
+    parser.add_argument('--alpha', type=float, default=0.05)
+    parser.add_argument('--beta', type=float, default=0.05)
+    parser.add_argument('--confidence', type=float, default=0.95)
+    parser.add_argument('--max-pairs', type=int, default=100000)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=50)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    test = SequentialTest(args.p0, args.p1, args.alpha, args.beta, args.confidence)
+    for test in iter_comparison(args.strategy_a, args.strategy_b, test, args.method, args.max_pairs, args.seed,
+                                args.workers, args.chunk_size, args.max_turns):
+        print(test.summary(), flush=True)
+    print(test.verdict(args.method) or "No verdict within the maximum number of pairs.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+import argparse
+import time
+
+import numpy as np
+
+from .engine import HAND_SIZE
+from .tiles import DOUBLE_SIX, tile_set_for
+
+RUNNING = 0
+PLAYER_WON = 1
+COMPUTER_WON = 2
+DRAWN = 3
+
+
+# Totals for a batch of simulated games. Side 0 is the player seat and side 1 the computer seat. The outcome and the
+# number of moves of every game are kept in outcomes and game_turns.
+class BatchResult:
+
+    def __init__(self, outcomes, turns, seconds):
+        self.outcomes = outcomes
+        self.game_turns = turns
+        self.games = len(outcomes)
+        self.player_wins = int(np.count_nonzero(outcomes == PLAYER_WON))
+        self.computer_wins = int(np.count_nonzero(outcomes == COMPUTER_WON))
+        self.draws = int(np.count_nonzero(outcomes == DRAWN))
+        self.turns = int(turns.sum())
+        self.seconds = seconds
+
+    def average_length(self):
+        return self.turns / self.games if self.games else 0.0
+
+    def games_per_second(self):
+        return self.games / self.seconds if self.seconds else 0.0
+
+    def summary(self):
+        return (f"games: {self.games}  player wins: {self.player_wins}  computer wins: {self.computer_wins}  "
+                f"draws: {self.draws}  average length: {self.average_length():.2f}  "
+                f"games/second: {self.games_per_second():.0f}")
+
+
+# Plays many games at once in lockstep with NumPy. Every array has the games along its first axis: the hands are
+# boolean piece matrices, the open ends and stock sizes are integer vectors and the visible number counts used by
+# computer_ai_algorithm are a games x sides x numbers matrix. Each step plays one move in every game that is still
+# running, using the greedy rule for both sides (highest scoring piece that fits, right end first, smallest piece on
+# ties, draw or pass when nothing fits) and the same end of game rules as GameState.
+class BatchSimulator:
+
+    def __init__(self, tile_set=DOUBLE_SIX, seed=None, hand_size=HAND_SIZE, draw_threshold=None):
+        if not 1 <= hand_size <= tile_set.size // 2:
+            raise ValueError(f"Cannot deal two hands of {hand_size} pieces from a set of {tile_set.size} pieces.")
+        self.tile_set = tile_set
+        self.hand_size = hand_size
+        self.draw_threshold = tile_set.pip_occurrences if draw_threshold is None else draw_threshold
+        self.rng = np.random.default_rng(seed)
+        tiles = np.array(tile_set.tiles)
+        self.tile_x = tiles[:, 0]
+        self.tile_y = tiles[:, 1]
+        self.pip_sums = self.tile_x + self.tile_y
+        numbers = np.arange(tile_set.max_pip + 1)
+        self.incidence = (self.tile_x[:, None] == numbers).astype(np.int16) + (self.tile_y[:, None] == numbers)
+        self.pip_masks = self.incidence.T > 0
+
+    # Simulate the given number of games. deals can be a games x pieces array of shuffled piece ids (dealt like
+    # allocate_domino_pieces) to replay known deals; by default fresh deals are drawn from the simulator's generator.
+    def run(self, games, deals=None):
+        start = time.perf_counter()
+        tile_count = self.tile_set.size
+        pip_occurrences = self.tile_set.pip_occurrences
+        hand_size = self.hand_size
+        everything = np.arange(games)
+
+        if deals is None:
+            deals = np.argsort(self.rng.random((games, tile_count)), axis=1)
+        hands = np.zeros((games, 2, tile_count), dtype=bool)
+        hands[everything[:, None], 0, deals[:, :hand_size]] = True
+        hands[everything[:, None], 1, deals[:, hand_size:2 * hand_size]] = True
+        stock = deals[:, 2 * hand_size:]
+        stock_top = np.full(games, stock.shape[1])
+
+        counts = hands.astype(np.int16) @ self.incidence
+        hand_pips = (hands * self.pip_sums).sum(axis=2)
+        played = np.zeros((games, self.tile_set.max_pip + 1), dtype=np.int16)
+
+        # The side holding the largest piece (the highest id) opens with it.
+        largest = np.where(hands, np.arange(tile_count), -1).max(axis=2)
+        opener = (largest[:, 1] > largest[:, 0]).astype(np.int64)
+        opening = largest[everything, opener]
+        hands[everything, opener, opening] = False
+        hand_pips[everything, opener] -= self.pip_sums[opening]
+        played += self.incidence[opening]
+        counts[everything, 1 - opener] += self.incidence[opening]
+        left = self.tile_x[opening].copy()
+        right = self.tile_y[opening].copy()
+        turn = 1 - opener
+
+        outcomes = np.full(games, RUNNING)
+        turns = np.zeros(games, dtype=np.int64)
+        active = everything
+
+        while len(active):
+            side = turn[active]
+            hand = hands[active, side]
+            playable = hand & (self.pip_masks[left[active]] | self.pip_masks[right[active]])
+            can_play = playable.any(axis=1)
+
+            # Play the best piece in every game where something fits.
+            games_playing = active[can_play]
+            if len(games_playing):
+                side_playing = side[can_play]
+                visible = counts[games_playing, side_playing]
+                scores = visible[:, self.tile_x] + visible[:, self.tile_y]
+                scores = np.where(playable[can_play], scores, -1)
+                piece = scores.argmax(axis=1)
+                x, y = self.tile_x[piece], self.tile_y[piece]
+
+                old_left, old_right = left[games_playing], right[games_playing]
+                on_right = (x == old_right) | (y == old_right)
+                right[games_playing] = np.where(on_right, np.where(x == old_right, y, x), old_right)
+                left[games_playing] = np.where(on_right, old_left, np.where(y == old_left, x, y))
+
+                hands[games_playing, side_playing, piece] = False
+                hand_pips[games_playing, side_playing] -= self.pip_sums[piece]
+                played[games_playing] += self.incidence[piece]
+                counts[games_playing, 1 - side_playing] += self.incidence[piece]
+
+            # Draw a piece in every game where nothing fits and the stock is not empty; the rest pass.
+            drawing = ~can_play & (stock_top[active] > 0)
+            games_drawing = active[drawing]
+            if len(games_drawing):
+                side_drawing = side[drawing]
+                stock_top[games_drawing] -= 1
+                piece = stock[games_drawing, stock_top[games_drawing]]
+                hands[games_drawing, side_drawing, piece] = True
+                hand_pips[games_drawing, side_drawing] += self.pip_sums[piece]
+                counts[games_drawing, side_drawing] += self.incidence[piece]
+
+            turns[active] += 1
+
+            # End of game checks, in the same order as GameState.check_for_win_condition.
+            empty_hand = ~hands[active, side].any(axis=1)
+            left_played = played[active, left[active]]
+            right_played = played[active, right[active]]
+            end_draw = (left[active] == right[active]) & (left_played >= self.draw_threshold)
+            blocked = (stock_top[active] == 0) & (left_played == pip_occurrences) & (right_played == pip_occurrences)
+
+            mover_pips = hand_pips[active, side]
+            other_pips = hand_pips[active, 1 - side]
+            blocked_result = np.where(mover_pips < other_pips, side + 1,
+                                      np.where(other_pips < mover_pips, 2 - side, DRAWN))
+            result = np.where(empty_hand, side + 1,
+                              np.where(end_draw, DRAWN, np.where(blocked, blocked_result, RUNNING)))
+            outcomes[active] = result
+
+            turn[active] = 1 - side
+            active = active[result == RUNNING]
+
+        return BatchResult(outcomes, turns, time.perf_counter() - start)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Simulate greedy self-play games in NumPy batches.")
+    parser.add_argument('-n', '--games', type=int, default=100000)
+    parser.add_argument('-b', '--batch-size', type=int, default=20000)
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('--max-pip', type=int, default=6, help="play with a double-N set (default: double-six)")
+    parser.add_argument('--hand-size', type=int, default=HAND_SIZE)
+    parser.add_argument('--draw-threshold', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    simulator = BatchSimulator(tile_set_for(args.max_pip), args.seed, args.hand_size, args.draw_threshold)
+    for start in range(0, args.games, args.batch_size):
+        print(simulator.run(min(args.batch_size, args.games - start)).summary(), flush=True)
+
+
+if __name__ == '__main__':
+    main()
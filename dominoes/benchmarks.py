@@ -0,0 +1,211 @@
+import argparse
+import json
+import platform
+import random
+import statistics
+import time
+
+from .engine import COMPUTER, PLAYER, GameState, allocate_domino_pieces, generate_full_domino_set, shuffle_domino_set
+from .strategies import GreedyStrategy, computer_ai_algorithm
+from .tournament import play_game
+
+SEED = 2024
+POSITION_MOVES = (0, 4, 10, 30)
+
+
+# A position reached by dealing with a fixed seed and letting the greedy strategy play up to the given number of
+# moves, stopping early rather than finishing the game, so every benchmark run measures the same running position.
+def position(seed, moves):
+    state = GameState.deal(random.Random(seed))
+    strategy = GreedyStrategy()
+    for _ in range(moves):
+        state.apply(strategy.choose_move(state))
+        if state.is_terminal():
+            state.undo()
+            break
+    return state
+
+
+def bench_deal():
+    rng = random.Random(SEED)
+
+    def run():
+        domino_set = generate_full_domino_set()
+        shuffle_domino_set(domino_set, rng)
+        allocate_domino_pieces(domino_set)
+    return run
+
+
+def bench_game_state_deal():
+    rng = random.Random(SEED)
+    return lambda: GameState.deal(rng)
+
+
+def bench_legal_moves(moves):
+    state = position(SEED, moves)
+    return state.legal_moves
+
+
+def bench_computer_ai_algorithm(moves):
+    state = position(SEED, moves)
+    return lambda: computer_ai_algorithm(state, state.status)
+
+
+def bench_greedy_decision(moves):
+    state = position(SEED, moves)
+    strategy = GreedyStrategy()
+    return lambda: strategy.choose_move(state)
+
+
+def bench_check_for_win_condition(moves):
+    state = position(SEED, moves)
+    status = state.status
+
+    def run():
+        state.check_for_win_condition()
+        state.status = status
+    return run
+
+
+# Make and take back the greedy move, as a search does at every node.
+def bench_apply_undo(moves):
+    state = position(SEED, moves)
+    move = GreedyStrategy().choose_move(state)
+
+    def run():
+        state.apply(move)
+        state.undo()
+    return run
+
+
+def bench_copy(moves):
+    return position(SEED, moves).copy
+
+
+def bench_full_game():
+    rng = random.Random(SEED)
+    strategy = GreedyStrategy()
+    seats = {PLAYER: strategy, COMPUTER: strategy}
+    return lambda: play_game(GameState.deal(rng), seats)
+
+
+# Name, factory and calls per timing sample. The factories build their inputs outside the timed loop. Position
+# benchmarks are named after the number of moves played so that the names stay comparable between revisions.
+def benchmarks():
+    cases = [
+        ('deal/generate_shuffle_allocate', bench_deal, 2000),
+        ('deal/GameState.deal', bench_game_state_deal, 2000),
+        ('game/greedy_full_game', bench_full_game, 50),
+    ]
+    for moves in POSITION_MOVES:
+        label = f'after_{moves}_moves'
+        cases.append((f'legal_moves/{label}', lambda moves=moves: bench_legal_moves(moves), 5000))
+        cases.append((f'computer_ai_algorithm/{label}', lambda moves=moves: bench_computer_ai_algorithm(moves), 5000))
+        cases.append((f'greedy_decision/{label}', lambda moves=moves: bench_greedy_decision(moves), 5000))
+        cases.append((f'check_for_win_condition/{label}', lambda moves=moves: bench_check_for_win_condition(moves),
+                      10000))
+        cases.append((f'apply_undo/{label}', lambda moves=moves: bench_apply_undo(moves), 5000))
+        cases.append((f'copy/{label}', lambda moves=moves: bench_copy(moves), 5000))
+    return cases
+
+
+# The hand and snake sizes of the benchmark positions, stored with the results.
+def describe_positions():
+    described = {}
+    for moves in POSITION_MOVES:
+        state = position(SEED, moves)
+        described[f'after_{moves}_moves'] = {'hand': state.hand_size(state.status), 'snake': len(state.board),
+                                             'stock': state.stock_top}
+    return described
+
+
+# Time a callable: a warm-up sample is thrown away, then each of the repeats samples the mean time per call over
+# number calls. Returns nanoseconds per call.
+def measure(function, number, repeats):
+    samples = []
+    for repeat in range(repeats + 1):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            function()
+        elapsed = (time.perf_counter_ns() - start) / number
+        if repeat:
+            samples.append(elapsed)
+    samples.sort()
+    return {
+        'min': samples[0],
+        'median': statistics.median(samples),
+        'mean': statistics.fmean(samples),
+        'stdev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'p95': samples[min(len(samples) - 1, round(0.95 * (len(samples) - 1)))],
+        'repeats': repeats,
+        'number': number,
+    }
+
+
+def run_benchmarks(repeats=15, name_filter=None, scale=1.0):
+    results = {}
+    for name, factory, number in benchmarks():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = measure(factory(), max(1, int(number * scale)), repeats)
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'unit': 'ns/call',
+        'seed': SEED,
+        'positions': describe_positions(),
+        'benchmarks': results,
+    }
+
+
+def format_time(nanoseconds):
+    if nanoseconds >= 1e6:
+        return f"{nanoseconds / 1e6:.2f} ms"
+    if nanoseconds >= 1e3:
+        return f"{nanoseconds / 1e3:.2f} us"
+    return f"{nanoseconds:.0f} ns"
+
+
+# Print the results, and when a baseline is given the ratio of each median to the baseline median. Benchmarks more
+# than threshold slower than the baseline are marked as regressions. Returns the number of regressions.
+def report(results, baseline=None, threshold=0.10):
+    regressions = 0
+    for name, stats in results['benchmarks'].items():
+        line = (f"{name:<48} median {format_time(stats['median']):>10}  min {format_time(stats['min']):>10}  "
+                f"stdev {format_time(stats['stdev']):>10}")
+        if baseline is not None and name in baseline['benchmarks']:
+            ratio = stats['median'] / baseline['benchmarks'][name]['median']
+            line += f"  x{ratio:.2f} vs baseline"
+            if ratio > 1 + threshold:
+                line += "  REGRESSION"
+                regressions += 1
+        print(line)
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the engine and computer AI hot paths.")
+    parser.add_argument('-r', '--repeats', type=int, default=15)
+    parser.add_argument('-k', '--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--scale', type=float, default=1.0, help="multiply the calls per sample")
+    parser.add_argument('--save', metavar='PATH', help="write the results to a JSON baseline file")
+    parser.add_argument('--compare', metavar='PATH', help="compare against a JSON baseline file")
+    parser.add_argument('--threshold', type=float, default=0.10, help="slowdown counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.repeats, args.filter, args.scale)
+    baseline = None
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+    regressions = report(results, baseline, args.threshold)
+
+    if args.save:
+        with open(args.save, 'w') as file:
+            json.dump(results, file, indent=2)
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
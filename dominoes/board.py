@@ -0,0 +1,122 @@
+from collections import deque
+
+from .tiles import DOUBLE_SIX, iter_ids
+
+LEFT = 'left'
+RIGHT = 'right'
+
+
+# Every way to play a piece of a hand on a snake with the given open ends, as (piece id, side, oriented piece)
+# triples from the smallest piece to the largest and the right end before the left end. The pip masks of the tile set
+# index the hand by number, so only the pieces showing an end number are looked at and the cost is proportional to
+# the number of placements returned.
+def placements(tile_set, hand, left_end, right_end):
+    tiles = tile_set.tiles
+    flipped_tiles = tile_set.flipped_tiles
+    found = []
+    playable = hand & (tile_set.pip_masks[left_end] | tile_set.pip_masks[right_end])
+    if not playable:
+        return found
+    for tile_id in iter_ids(playable):
+        piece = tiles[tile_id]
+        x, y = piece
+        if x == right_end:
+            found.append((tile_id, RIGHT, piece))
+        elif y == right_end:
+            found.append((tile_id, RIGHT, flipped_tiles[tile_id]))
+        if y == left_end:
+            found.append((tile_id, LEFT, piece))
+        elif x == left_end:
+            found.append((tile_id, LEFT, flipped_tiles[tile_id]))
+    return found
+
+
+# The domino snake. The pieces are kept in a deque so that both ends can be extended in O(1), and the numbers on the
+# two open ends, the played pieces as a bit mask and how many times every number has been played are kept as fields
+# so that nothing ever needs to walk the chain.
+class Board:
+
+    def __init__(self, tile_set=DOUBLE_SIX):
+        self.tile_set = tile_set
+        self.chain = deque()
+        self.left_end = None
+        self.right_end = None
+        self.mask = 0
+        self.pip_counts = [0] * (tile_set.max_pip + 1)
+
+    def __len__(self):
+        return len(self.chain)
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.tile_set = self.tile_set
+        board.chain = self.chain.copy()
+        board.left_end = self.left_end
+        board.right_end = self.right_end
+        board.mask = self.mask
+        board.pip_counts = list(self.pip_counts)
+        return board
+
+    # Return the piece oriented so that it joins the given side of the snake, or None if it cannot be played there.
+    def placement(self, tile_id, side):
+        piece = self.tile_set.tiles[tile_id]
+        if side == RIGHT:
+            if piece[0] == self.right_end:
+                return piece
+            elif piece[1] == self.right_end:
+                return self.tile_set.flipped_tiles[tile_id]
+        else:
+            if piece[1] == self.left_end:
+                return piece
+            elif piece[0] == self.left_end:
+                return self.tile_set.flipped_tiles[tile_id]
+        return None
+
+    # Add an already oriented piece to one side of the snake. The first piece opens both ends.
+    def add(self, tile_id, oriented_piece, side):
+        x, y = oriented_piece
+        if not self.chain:
+            self.chain.append(oriented_piece)
+            self.left_end = x
+            self.right_end = y
+        elif side == RIGHT:
+            self.chain.append(oriented_piece)
+            self.right_end = y
+        else:
+            self.chain.appendleft(oriented_piece)
+            self.left_end = x
+        self.mask |= 1 << tile_id
+        self.pip_counts[x] += 1
+        self.pip_counts[y] += 1
+
+    # Take the piece at one end of the snake off again, the reverse of add. The open ends are read back from the new
+    # end pieces. Returns the removed piece as it was oriented in the snake.
+    def remove(self, tile_id, side):
+        chain = self.chain
+        x, y = chain.pop() if side == RIGHT else chain.popleft()
+        if chain:
+            self.left_end = chain[0][0]
+            self.right_end = chain[-1][1]
+        else:
+            self.left_end = None
+            self.right_end = None
+        self.mask &= ~(1 << tile_id)
+        self.pip_counts[x] -= 1
+        self.pip_counts[y] -= 1
+        return x, y
+
+    # True when every piece showing either open end number has been played, so no piece left anywhere in the game
+    # can ever join the snake again.
+    def is_blocked(self):
+        pip_occurrences = self.tile_set.pip_occurrences
+        return self.pip_counts[self.left_end] == pip_occurrences and self.pip_counts[self.right_end] == pip_occurrences
+
+    # The snake as shown to the player: the whole snake while it has at most 6 pieces, otherwise the first 3 and the
+    # last 3 pieces. Only the shown pieces are looked at, using the piece strings the tile set builds once.
+    def render(self):
+        chain = self.chain
+        strings = self.tile_set.strings
+        if len(chain) > 6:
+            return (strings[chain[0]] + strings[chain[1]] + strings[chain[2]] + '...' +
+                    strings[chain[-3]] + strings[chain[-2]] + strings[chain[-1]])
+        return ''.join([strings[piece] for piece in chain])
@@ -0,0 +1,33 @@
+from .board import LEFT, RIGHT
+from .engine import DRAW, PASS, PLAYER
+from .tiles import iter_ids
+
+# The commands a human types to move, shared by the console game, the console table and the game server: a piece
+# number from the hand list to play it on the right of the snake, the negative number to play it on the left, or 0 to
+# draw from the stock (or pass once the stock is empty).
+INVALID_INPUT = "Invalid input. Please try again."
+ILLEGAL_MOVE = "Illegal move. Please try again."
+
+
+# Whether the text is a command at all for a hand of the given size, before the move it names is looked at.
+def is_valid_command(text, hand_size):
+    return text.count('-') <= 1 and text.lstrip('-').isdigit() and abs(int(text)) <= hand_size
+
+
+# Turn a command of the given side into an engine move. Raises ValueError with the message to show when the command
+# is not a piece number of the hand or the move is not legal.
+def parse_command(text, state, side=PLAYER):
+    if not is_valid_command(text, state.hand_size(side)):
+        raise ValueError(INVALID_INPUT)
+
+    number = int(text)
+    if number > 0:
+        move = list(iter_ids(state.hands[side]))[number - 1], RIGHT
+    elif number < 0:
+        move = list(iter_ids(state.hands[side]))[abs(number) - 1], LEFT
+    else:
+        move = DRAW if state.stock_top else PASS
+
+    if not state.is_legal(move):
+        raise ValueError(ILLEGAL_MOVE)
+    return move
@@ -0,0 +1,202 @@
+import argparse
+
+from .commands import ILLEGAL_MOVE, INVALID_INPUT, is_valid_command
+from .engine import (COMPUTER, COMPUTER_WINS, DRAW, GAME_OVER_DRAW, HAND_SIZE, LEFT, PASS, PLAYER, PLAYER_WINS, RIGHT,
+                     GameState, allocate_domino_pieces, generate_full_domino_set, shuffle_domino_set)
+from .evaluation import WeightedStrategy
+from .profiling import Profiler
+from .solver import shared_solver
+from .strategies import computer_ai_algorithm
+from .tiles import iter_ids, tile_set_for
+
+
+class Domino:
+
+    # The console game is a thin adapter around the input and output free engine.GameState. All of the game
+    # rules live in the engine and the computer's moves come from a pluggable strategy object. The game is played
+    # with a double-six set and seven piece hands unless another double-N set, hand size or draw threshold is given.
+    # The default computer strategy scores moves with the tuned weights installed in the user's configuration
+    # directory when there are some (see evaluation.py) and otherwise plays like the original greedy algorithm.
+    def __init__(self, computer_strategy=None, endgame_threshold=14, profiler=None, max_pip=6, hand_size=HAND_SIZE,
+                 draw_threshold=None):
+        self.tile_set = tile_set_for(max_pip)
+        self.hand_size = hand_size
+        self.draw_threshold = draw_threshold
+        self.full_domino_set = []
+        self.state = None
+        self.computer_strategy = computer_strategy if computer_strategy is not None else WeightedStrategy()
+        self.endgame_solver = shared_solver(self.tile_set, draw_threshold)
+        self.endgame_threshold = endgame_threshold
+        self.player_input = None
+        self.profiler = profiler
+        if profiler is not None:
+            profiler.attach(self)
+
+    # Method for generating the initial set of dominoes used for the game.
+    def generate_full_domino_set(self):
+        self.full_domino_set = generate_full_domino_set(self.tile_set)
+
+    # Method to shuffle the initial domino set randomly.
+    def shuffle_domino_set(self):
+        shuffle_domino_set(self.full_domino_set)
+
+    # Method to slice the list of dominoes into the player list, computer list, and stock pieces list.
+    def allocate_domino_pieces(self):
+        self.state = GameState.from_pieces(*allocate_domino_pieces(self.full_domino_set, self.hand_size),
+                                           tile_set=self.tile_set, draw_threshold=self.draw_threshold)
+
+    # Method to select the starting player by checking to see if the player or computer has the largest domino by
+    # number. The player with the largest domino will play that domino automatically as the starting game piece to
+    # begin the domino snake.
+    def determine_starting_player(self):
+        self.state.determine_starting_player()
+
+    # Method to check a player's input for a valid input. The only valid inputs are -length of the player pieces
+    # list to length of the player pieces list. It only looks at the text, so its time is the validation alone.
+    def validate_player_input(self, player_input):
+        return is_valid_command(player_input, self.state.hand_size(PLAYER))
+
+    # Method to ask the player again until the input is valid.
+    def check_player_input(self):
+        while not self.validate_player_input(self.player_input):
+            print(INVALID_INPUT)
+            self.player_input = input()
+
+    # Method to play the domino selected by the player after the player's input has been checked for validity.
+    # This method can play the player's input domino to the right or left of the domino snake.
+    # If the player enters a negative number, then the domino will attempt to be played to the left of the domino snake.
+    # If the player enters a positive number, then the domino will attempt to be played to the right of the domino
+    # snake. If the player enters 0, then the player draws a domino from the stock (or passes if the stock is empty).
+    def player_move(self):
+        while True:
+            self.player_input = input()
+            self.check_player_input()
+            player_input = int(self.player_input)
+
+            if player_input > 0:
+                move = list(iter_ids(self.state.hands[PLAYER]))[player_input - 1], RIGHT
+            elif player_input < 0:
+                move = list(iter_ids(self.state.hands[PLAYER]))[abs(player_input) - 1], LEFT
+            else:
+                move = DRAW if self.state.stock_top else PASS
+
+            if self.is_legal_move(move):
+                self.make_move(move)
+                break
+            else:
+                print(ILLEGAL_MOVE)
+
+    # Method to calculate the optimal piece within the computer's pieces that it should play. The algorithm is that
+    # the computer should first count every number on every domino that it has within its pieces combined with every
+    # number on every domino that has already been played. This first step determines the count. After counting the
+    # number of numbers on the dominoes, the computer should add each count together for each domino that it holds
+    # within its current pieces. This second step determines the score.
+    # A score is generated for every domino and this method will return the list of each domino's score.
+    def computer_ai_algorithm(self):
+        return computer_ai_algorithm(self.state, COMPUTER)
+
+    # This method asks the computer strategy for a move. The default strategy uses the scores from the
+    # computer_ai_algorithm method to determine which domino is most optimal to attempt to play next. The computer will
+    # determine the domino with the highest score and first attempt to play that domino to the right of the domino
+    # snake and then to the left of the domino snake if it cannot be played first to the right. If the highest scoring
+    # domino cannot be played to the right or the left of the domino snake then the computer will select the domino
+    # with the second highest score and so on. If none of the dominoes that the computer currently has within its
+    # pieces can be played then the computer will draw a domino from the game stock pieces and end its turn.
+    # Once the stock is empty and at most endgame_threshold dominoes are left in both hands, the rest of the game is
+    # solved exactly instead and the computer plays a proven best move.
+    def choose_computer_move(self):
+        if self.endgame_solver.can_solve(self.state, self.endgame_threshold):
+            return self.endgame_solver.solve(self.state)[1]
+        return self.computer_strategy.choose_move(self.state)
+
+    # This method plays the move chosen for the computer.
+    def computer_move(self):
+        self.make_move(self.choose_computer_move())
+
+    # These methods check and play a move for the side whose turn it is. Every move of the game goes through them.
+    def is_legal_move(self, move):
+        return self.state.is_legal(move)
+
+    def make_move(self, move):
+        self.state.apply(move)
+
+    # This method will check to see if the game has ended or not based on four conditions. If the player or computer
+    # has no pieces then the game ends. If the ends of the domino snake are identical numbers and that number appears
+    # at least 8 times within the domino snake then the game is a draw and the game ends. Once the stock is empty and
+    # neither side can ever play again the game is blocked, and the side with the fewest pips left wins.
+    def check_for_win_condition(self):
+        return self.state.is_terminal()
+
+    # This method will display the status of the game.
+    def display_game_status(self):
+        if self.state.status == PLAYER:
+            print("\n""Status: It's your turn to make a move. Enter your command.")
+        elif self.state.status == COMPUTER:
+            print("\n""Status: Computer is about to make a move. Press Enter to continue...")
+        elif self.state.status == PLAYER_WINS:
+            print("\n""Status: The game is over. You won!")
+        elif self.state.status == COMPUTER_WINS:
+            print("\n""Status: The game is over. The computer won!")
+        elif self.state.status == GAME_OVER_DRAW:
+            print("\n""Status: The game is over. It's a draw!")
+
+    # This method prints the domino snake used for the game and assigns correct formatting to the read out. If the
+    # domino snake is more than 6 dominoes long then only its first 3 and last 3 dominoes are displayed.
+    def print_domino_snake(self):
+        print(self.state.board.render())
+        print()
+
+    # This method prints the player's interface for playing the domino game.
+    def game_interface(self):
+        print("=" * 70)
+        print(f"Stock size:", self.state.stock_top)
+        print(f"Computer pieces:", self.state.hand_size(COMPUTER))
+        print()
+
+        self.print_domino_snake()
+
+        print("Your pieces:")
+        for i, domino in enumerate(self.state.player_pieces, 1):
+            print(i, list(domino), sep=':')
+
+        self.display_game_status()
+
+    # This method executes the domino game and only stops executing when the game has ended. If a profiler is
+    # attached, its report is exported at the end of the game.
+    def main(self):
+        self.generate_full_domino_set()
+        self.shuffle_domino_set()
+        self.allocate_domino_pieces()
+        self.determine_starting_player()
+
+        while not self.check_for_win_condition():
+            self.game_interface()
+            if self.state.status == PLAYER:
+                self.player_move()
+            else:
+                self.player_input = input()
+                self.computer_move()
+
+        self.game_interface()
+
+        if self.profiler is not None:
+            self.profiler.export()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play dominoes against the computer at the console.")
+    parser.add_argument('--max-pip', type=int, default=6, help="play with a double-N set (default: double-six)")
+    parser.add_argument('--hand-size', type=int, default=HAND_SIZE)
+    parser.add_argument('--draw-threshold', type=int, default=None)
+    parser.add_argument('--endgame-threshold', type=int, default=14,
+                        help="solve the rest of the game exactly once both hands hold at most this many pieces")
+    parser.add_argument('--profile', action='store_true', help="print where the time went at the end of the game")
+    args = parser.parse_args(argv)
+
+    profiler = Profiler() if args.profile else None
+    Domino(endgame_threshold=args.endgame_threshold, profiler=profiler, max_pip=args.max_pip, hand_size=args.hand_size,
+           draw_threshold=args.draw_threshold).main()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,290 @@
+import random
+
+from .board import LEFT, RIGHT, Board, placements
+from .tiles import DOUBLE_SIX, popcount
+
+PLAYER = 'player'
+COMPUTER = 'computer'
+PLAYER_WINS = 'player_wins'
+COMPUTER_WINS = 'computer_wins'
+GAME_OVER_DRAW = 'game_over_draw'
+
+DRAW = 'draw'
+PASS = 'pass'
+
+OPPONENT = {PLAYER: COMPUTER, COMPUTER: PLAYER}
+OTHERS = {PLAYER: (COMPUTER,), COMPUTER: (PLAYER,)}
+WINNER = {PLAYER: PLAYER_WINS, COMPUTER: COMPUTER_WINS}
+
+HAND_SIZE = 7
+
+
+# Function for generating the initial set of dominoes used for the game.
+def generate_full_domino_set(tile_set=DOUBLE_SIX):
+    return list(tile_set.tiles)
+
+
+# Function to shuffle a domino set in place. Any object with a shuffle method (e.g. a seeded random.Random) can be
+# passed so that simulated games are reproducible.
+def shuffle_domino_set(domino_set, rng=random):
+    rng.shuffle(domino_set)
+
+
+# Function to slice a shuffled domino set into the player pieces, computer pieces and stock pieces.
+def allocate_domino_pieces(domino_set, hand_size=HAND_SIZE):
+    if not 1 <= hand_size <= len(domino_set) // 2:
+        raise ValueError(f"Cannot deal two hands of {hand_size} pieces from a set of {len(domino_set)} pieces.")
+    return (list(domino_set[:hand_size]), list(domino_set[hand_size:2 * hand_size]),
+            list(domino_set[2 * hand_size:]))
+
+
+# The game state holds everything needed to play a game of dominoes without any input or output. Hands are bit masks
+# over the piece ids of the tile set, the stock is the shuffled order of the stock piece ids plus the number of
+# pieces left in it, and the snake is a Board, so playing or drawing a piece costs the same however long the game.
+# Moves are either a (piece id, side) tuple, DRAW (take a piece from the stock) or PASS (only when the stock is
+# empty). The status is the side to move while the game is running and one of the result strings once it has ended.
+#
+# pip_counts keeps, for each side, how many times every number appears on the pieces that side can see (its own
+# hand plus the snake). It is updated as pieces are played and drawn so that strategies can read it for free.
+# hand_pips keeps the total of the numbers in each hand, which decides a blocked game. voids keeps, for each side, a
+# bit mask of the numbers it was seen unable to match: the open end numbers at every turn it drew or passed.
+#
+# draw_threshold is how many times a number must be in the snake for the game to end in a draw when both ends show
+# it. By default that is every appearance of the number in the set (eight for double-six).
+#
+# Every applied move is pushed on history together with the status and voids before it, so undo can take moves back
+# in O(1) and a snapshot is just the length of the history: search and what-if analysis can play ahead on one state
+# and restore it instead of copying.
+class GameState:
+
+    # The side that moves after each side, and the other sides of each side. Subclasses with more seats replace them
+    # with their own seat order.
+    next_side = OPPONENT
+    others = OTHERS
+
+    def __init__(self, player_hand, computer_hand, stock, stock_top=None, board=None, status=None,
+                 tile_set=DOUBLE_SIX, draw_threshold=None):
+        self.setup({PLAYER: player_hand, COMPUTER: computer_hand}, stock, stock_top, board, status, tile_set,
+                   draw_threshold)
+
+    # Everything but the hands is the same for any number of sides. hands maps every side, in seat order, to its
+    # hand mask, and the running tables are kept under the same keys.
+    def setup(self, hands, stock, stock_top, board, status, tile_set, draw_threshold):
+        self.tile_set = tile_set
+        self.draw_threshold = tile_set.pip_occurrences if draw_threshold is None else draw_threshold
+        if not 2 <= self.draw_threshold <= tile_set.pip_occurrences:
+            raise ValueError(f"The draw threshold must be between 2 and {tile_set.pip_occurrences}.")
+        self.hands = hands
+        self.stock = tuple(stock)
+        self.stock_top = len(self.stock) if stock_top is None else stock_top
+        self.board = board if board is not None else Board(tile_set)
+        self.status = status
+        self.history = []
+        self.voids = dict.fromkeys(hands, 0)
+        self.pip_counts = {side: self.count_visible_pips(side) for side in hands}
+        self.hand_pips = {side: tile_set.pip_total(hand) for side, hand in hands.items()}
+
+    # Build a state from lists of pieces, e.g. the output of allocate_domino_pieces. The last stock piece is drawn
+    # first.
+    @classmethod
+    def from_pieces(cls, player_pieces, computer_pieces, stock_pieces, tile_set=DOUBLE_SIX, draw_threshold=None):
+        return cls(tile_set.mask(player_pieces), tile_set.mask(computer_pieces),
+                   [tile_set.ids[tuple(piece)] for piece in stock_pieces], tile_set=tile_set,
+                   draw_threshold=draw_threshold)
+
+    # Create a freshly shuffled and dealt game with the opening piece already played.
+    @classmethod
+    def deal(cls, rng=random, tile_set=DOUBLE_SIX, hand_size=HAND_SIZE, draw_threshold=None):
+        domino_set = list(range(tile_set.size))
+        shuffle_domino_set(domino_set, rng)
+        return cls.from_deal(domino_set, tile_set, hand_size, draw_threshold)
+
+    # Start the game for a shuffled list of piece ids, dealt like allocate_domino_pieces.
+    @classmethod
+    def from_deal(cls, deal, tile_set=DOUBLE_SIX, hand_size=HAND_SIZE, draw_threshold=None):
+        player_ids, computer_ids, stock = allocate_domino_pieces(deal, hand_size)
+        state = cls(sum(1 << tile_id for tile_id in player_ids), sum(1 << tile_id for tile_id in computer_ids),
+                    stock, tile_set=tile_set, draw_threshold=draw_threshold)
+        state.determine_starting_player()
+        return state
+
+    @property
+    def player_pieces(self):
+        return self.tile_set.tiles_in(self.hands[PLAYER])
+
+    @property
+    def computer_pieces(self):
+        return self.tile_set.tiles_in(self.hands[COMPUTER])
+
+    @property
+    def domino_snake(self):
+        return list(self.board.chain)
+
+    @property
+    def stock_pieces(self):
+        return [self.tile_set.tiles[tile_id] for tile_id in self.stock[:self.stock_top]]
+
+    def hand_size(self, side):
+        return popcount(self.hands[side])
+
+    # Count the visible numbers of a side from scratch. Only needed when a state is created.
+    def count_visible_pips(self, side):
+        visible = self.hands[side] | self.board.mask
+        return [self.tile_set.pip_count(visible, number) for number in range(self.tile_set.max_pip + 1)]
+
+    # Subclasses copy the attributes they add on top of this. Without the history the copy costs the same however long
+    # the game has been, but the moves played before it was made cannot be undone on it.
+    def copy(self, history=True):
+        state = object.__new__(type(self))
+        state.tile_set = self.tile_set
+        state.draw_threshold = self.draw_threshold
+        state.hands = dict(self.hands)
+        state.stock = self.stock
+        state.stock_top = self.stock_top
+        state.board = self.board.copy()
+        state.status = self.status
+        state.history = list(self.history) if history else []
+        state.voids = dict(self.voids)
+        state.pip_counts = {side: list(counts) for side, counts in self.pip_counts.items()}
+        state.hand_pips = dict(self.hand_pips)
+        return state
+
+    # The side holding the largest domino plays it as the first piece of the snake and the next side moves next.
+    # Larger pieces have larger ids, so the largest piece in a hand is its highest bit.
+    def determine_starting_player(self):
+        opener = max(self.hands, key=lambda side: self.hands[side].bit_length())
+        tile_id = self.hands[opener].bit_length() - 1
+        self._play(opener, tile_id, self.tile_set.tiles[tile_id], RIGHT)
+        self.status = self.next_side[opener]
+
+    def placement(self, tile_id, side):
+        return self.board.placement(tile_id, side)
+
+    # Every move available to the side to move. Drawing from the stock is always allowed, and passing is only
+    # possible once the stock is empty.
+    def legal_moves(self):
+        moves = [(tile_id, side) for tile_id, side, _ in self.placements()]
+        moves.append(DRAW if self.stock_top else PASS)
+        return moves
+
+    # Every piece the side (by default the side to move) can play, as (piece id, side, oriented piece) triples in
+    # legal_moves order.
+    def placements(self, side=None):
+        hand = self.hands[self.status if side is None else side]
+        return placements(self.tile_set, hand, self.board.left_end, self.board.right_end)
+
+    def is_legal(self, move):
+        if self.is_terminal():
+            return False
+        if move == DRAW:
+            return self.stock_top != 0
+        if move == PASS:
+            return self.stock_top == 0
+        tile_id, side = move
+        return (self.hands[self.status] >> tile_id) & 1 == 1 and self.board.placement(tile_id, side) is not None
+
+    # A played piece stays visible to the side that played it and becomes visible to the other sides.
+    def _play(self, side_to_move, tile_id, oriented_piece, side):
+        self.hands[side_to_move] &= ~(1 << tile_id)
+        self.board.add(tile_id, oriented_piece, side)
+        self.hand_pips[side_to_move] -= self.tile_set.pip_sums[tile_id]
+        x, y = oriented_piece
+        for other in self.others[side_to_move]:
+            counts = self.pip_counts[other]
+            counts[x] += 1
+            counts[y] += 1
+
+    # Play a move for the side to move, then either end the game or hand the turn to the other side.
+    def apply(self, move):
+        if not self.is_legal(move):
+            raise ValueError(f"Illegal move: {move!r}")
+
+        self.history.append((move, self.status, self.voids[self.status]))
+        if move == DRAW or move == PASS:
+            self.voids[self.status] |= (1 << self.board.left_end) | (1 << self.board.right_end)
+        if move == DRAW:
+            self.stock_top -= 1
+            tile_id = self.stock[self.stock_top]
+            self.hands[self.status] |= 1 << tile_id
+            self.hand_pips[self.status] += self.tile_set.pip_sums[tile_id]
+            x, y = self.tile_set.tiles[tile_id]
+            counts = self.pip_counts[self.status]
+            counts[x] += 1
+            counts[y] += 1
+        elif move != PASS:
+            tile_id, side = move
+            self._play(self.status, tile_id, self.board.placement(tile_id, side), side)
+
+        if not self.check_for_win_condition():
+            self.status = self.next_side[self.status]
+        return self
+
+    # The reverse of _play.
+    def _unplay(self, side_to_move, tile_id, side):
+        x, y = self.board.remove(tile_id, side)
+        self.hands[side_to_move] |= 1 << tile_id
+        self.hand_pips[side_to_move] += self.tile_set.pip_sums[tile_id]
+        for other in self.others[side_to_move]:
+            counts = self.pip_counts[other]
+            counts[x] -= 1
+            counts[y] -= 1
+
+    # Take back the last applied move, including the end of the game it may have caused. Returns the move.
+    def undo(self):
+        if not self.history:
+            raise ValueError("There is no move to undo.")
+
+        move, status, voids = self.history.pop()
+        self.voids[status] = voids
+        if move == DRAW:
+            tile_id = self.stock[self.stock_top]
+            self.stock_top += 1
+            self.hands[status] &= ~(1 << tile_id)
+            self.hand_pips[status] -= self.tile_set.pip_sums[tile_id]
+            x, y = self.tile_set.tiles[tile_id]
+            counts = self.pip_counts[status]
+            counts[x] -= 1
+            counts[y] -= 1
+        elif move != PASS:
+            self._unplay(status, *move)
+        self.status = status
+        return move
+
+    def snapshot(self):
+        return len(self.history)
+
+    # Undo moves until the state is back where it was when the snapshot was taken.
+    def restore(self, snapshot):
+        while len(self.history) > snapshot:
+            self.undo()
+
+    # The game ends when a side has no pieces left, or when both ends of the snake show the same number and
+    # draw_threshold of that number (by default all of them) are already in the snake. It also ends once the stock
+    # is empty and every piece matching either end has been played, since then neither side can ever move again; the
+    # side with the fewest pips left in hand wins that blocked game, and equal totals are a draw.
+    def check_for_win_condition(self):
+        if self.hands[PLAYER] == 0:
+            self.status = PLAYER_WINS
+            return True
+        elif self.hands[COMPUTER] == 0:
+            self.status = COMPUTER_WINS
+            return True
+        elif (self.board.left_end == self.board.right_end and
+              self.board.pip_counts[self.board.left_end] >= self.draw_threshold):
+            self.status = GAME_OVER_DRAW
+            return True
+        elif self.stock_top == 0 and self.board.is_blocked():
+            if self.hand_pips[PLAYER] < self.hand_pips[COMPUTER]:
+                self.status = PLAYER_WINS
+            elif self.hand_pips[COMPUTER] < self.hand_pips[PLAYER]:
+                self.status = COMPUTER_WINS
+            else:
+                self.status = GAME_OVER_DRAW
+            return True
+        return False
+
+    def is_terminal(self):
+        return self.status in (PLAYER_WINS, COMPUTER_WINS, GAME_OVER_DRAW)
+
+    def result(self):
+        return self.status if self.is_terminal() else None
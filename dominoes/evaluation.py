@@ -0,0 +1,106 @@
+import json
+import os
+
+from .board import RIGHT
+from .engine import DRAW, PASS
+from .tiles import popcount
+
+# The features a move is scored on, for the side to move:
+#   pip_frequency      how often the piece's two numbers appear among the pieces the side can see, the score
+#                      computer_ai_algorithm gives a piece
+#   double             1 for a double
+#   pip_value          the total of the piece's numbers, which counts against the side in a blocked game
+#   open_end_matching  how many pieces left in the hand fit one of the open ends after the move
+#   opponent_voids     how many of the open ends after the move show a number the next side was seen drawing or
+#                      passing on
+FEATURES = ('pip_frequency', 'double', 'pip_value', 'open_end_matching', 'opponent_voids')
+
+# Scoring on the pip frequency alone plays exactly like GreedyStrategy.
+DEFAULT_WEIGHTS = (1.0, 0.0, 0.0, 0.0, 0.0)
+
+WEIGHTS_VERSION = 1
+# Tuned weights only replace DEFAULT_WEIGHTS once they are installed in the user's configuration directory, never
+# from inside the package, so running the tuner does not change the default opponent behind the user's back.
+CONFIG_HOME = os.environ.get('XDG_CONFIG_HOME') or os.path.join(os.path.expanduser('~'), '.config')
+DEFAULT_WEIGHTS_PATH = os.path.join(CONFIG_HOME, 'dominoes', 'weights.json')
+
+
+# The feature values of every piece the side to move can play, as (move, features) pairs in legal_moves order:
+# smallest piece first and the right end before the left end.
+def move_features(state):
+    side = state.status
+    tile_set = state.tile_set
+    tiles = tile_set.tiles
+    pip_masks = tile_set.pip_masks
+    counts = state.pip_counts[side]
+    hand = state.hands[side]
+    voids = state.voids[state.next_side[side]]
+    left, right = state.board.left_end, state.board.right_end
+
+    features = []
+    for tile_id, board_side, piece in state.placements():
+        x, y = tiles[tile_id]
+        if board_side == RIGHT:
+            new_left, new_right = left, piece[1]
+        else:
+            new_left, new_right = piece[0], right
+        features.append(((tile_id, board_side), (
+            counts[x] + counts[y],
+            1 if x == y else 0,
+            x + y,
+            popcount(hand & ~(1 << tile_id) & (pip_masks[new_left] | pip_masks[new_right])),
+            ((voids >> new_left) & 1) + ((voids >> new_right) & 1),
+        )))
+    return features
+
+
+def save_weights(path, weights):
+    if len(weights) != len(FEATURES):
+        raise ValueError(f"Expected {len(FEATURES)} weights, got {len(weights)}.")
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'w') as file:
+        json.dump({'version': WEIGHTS_VERSION, 'features': list(FEATURES), 'weights': [float(w) for w in weights]},
+                  file, indent=2)
+
+
+def load_weights(path):
+    with open(path) as file:
+        data = json.load(file)
+    if data.get('version') != WEIGHTS_VERSION or data.get('features') != list(FEATURES):
+        raise ValueError(f"{path} is not a version {WEIGHTS_VERSION} weights file for the features {FEATURES}.")
+    return tuple(data['weights'])
+
+
+LOADED_WEIGHTS = {}
+
+
+# The weights in the default weights file when one has been installed there, otherwise DEFAULT_WEIGHTS. The file is
+# read once per process.
+def default_weights():
+    if DEFAULT_WEIGHTS_PATH not in LOADED_WEIGHTS:
+        if os.path.exists(DEFAULT_WEIGHTS_PATH):
+            LOADED_WEIGHTS[DEFAULT_WEIGHTS_PATH] = load_weights(DEFAULT_WEIGHTS_PATH)
+        else:
+            LOADED_WEIGHTS[DEFAULT_WEIGHTS_PATH] = DEFAULT_WEIGHTS
+    return LOADED_WEIGHTS[DEFAULT_WEIGHTS_PATH]
+
+
+# Play the legal piece with the highest weighted feature score, and draw or pass when nothing fits. Ties go to the
+# earlier move in legal_moves order, so the default weights play exactly like GreedyStrategy.
+class WeightedStrategy:
+
+    def __init__(self, weights=None):
+        self.weights = tuple(weights) if weights is not None else default_weights()
+
+    def choose_move(self, state):
+        weights = self.weights
+        best_move, best_score = None, None
+        for move, features in move_features(state):
+            score = sum(weight * value for weight, value in zip(weights, features))
+            if best_move is None or score > best_score:
+                best_move, best_score = move, score
+        if best_move is None:
+            return DRAW if state.stock_top else PASS
+        return best_move
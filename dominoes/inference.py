@@ -0,0 +1,209 @@
+import random
+
+from .engine import DRAW, OPPONENT, PASS, RIGHT
+from .tiles import iter_ids, popcount
+
+# The columns of a row of HandTracker.probabilities: where a piece the observer cannot see may be.
+LOCATIONS = ('opponent_hand', 'stock')
+
+
+# A copy of the state with the opponent's hand and the stock (in drawing order, the last piece is drawn first)
+# replaced by a guess. The copy starts with an empty history, so making one does not get slower as the game goes on;
+# only the moves played on it can be undone.
+def determinize(state, opponent, opponent_hand, stock):
+    determinization = state.copy(history=False)
+    determinization.hands[opponent] = opponent_hand
+    determinization.stock = tuple(stock)
+    determinization.stock_top = len(determinization.stock)
+    determinization.pip_counts[opponent] = determinization.count_visible_pips(opponent)
+    determinization.hand_pips[opponent] = state.tile_set.pip_total(opponent_hand)
+    return determinization
+
+
+# What one side can infer about the other side's hand from the moves it has watched. The opponent hand is tracked as
+# slots, one per piece it was dealt or drew, grouped by what is known about the piece in them:
+#   - a dealt piece is smaller than the opening piece, since the largest piece of either hand opens the game,
+#   - a piece held while the opponent drew or passed shows neither open end number at the time, on the assumption
+#     that a side only draws or passes when nothing fits, as every computer strategy does.
+# Groups are kept oldest first as [voids, limit, count]: voids is a bit mask of the numbers the pieces cannot show,
+# limit the piece id they are smaller than and count the number of slots. Every draw or pass adds its end numbers to
+# every group and a draw then opens a new unconstrained group, so an older group is always at least as constrained as
+# a newer one and the pieces each group allows are nested. Every way of filling the slots with allowed pieces is
+# equally likely, so a hand is as likely as the number of ways its pieces can be spread over the groups. That is the
+# posterior of the slot model, not the uniform distribution over hands: with one slot allowing {a, b} and one allowing
+# {a, b, c}, the hand {a, b} comes up half the time. The nesting makes it easy to work with: filling the groups oldest
+# first, each from the allowed pieces not yet taken, samples it exactly and gives the probability of every piece in
+# closed form.
+#
+# A played piece could have come from any group that allows it. It is taken from the oldest one, which keeps the real
+# hand among the allowed ones and only ever forgets information. When the constraints still cannot be met (a human
+# drew with a piece that fitted), the voids are dropped, and then the opening limit too.
+#
+# The tracker follows a game through its history, so each new event costs O(groups) and catching up after a search
+# that played ahead and undid its moves, or moving on to a new game, just replays the history. It works for any
+# observer of a two sided GameState.
+class HandTracker:
+
+    def __init__(self, observer):
+        self.observer = observer
+        self.opponent = OPPONENT[observer]
+        self.stock = None
+        self.seen = 0
+        self.groups = []
+        self.left = self.right = None
+        self.layers = None
+        self.matrix = None
+
+    # Bring the groups up to date with the moves played since the last call. The game is recognised by its stock, which
+    # may be an equal copy when the state was sent to another process.
+    def sync(self, state):
+        history = state.history
+        if (state.stock is not self.stock and state.stock != self.stock) or len(history) < self.seen:
+            self.start(state)
+        elif len(history) == self.seen:
+            return self
+
+        for move, side, _ in history[self.seen:]:
+            self.event(state.tile_set, side, move)
+        self.seen = len(history)
+        # The hidden pieces change with every move, whoever made it.
+        self.layers = self.matrix = None
+        self.check(state)
+        return self
+
+    # Replay the game from the opening when the history reaches back to it, otherwise start from what the opponent
+    # holds now with nothing known about it.
+    def start(self, state):
+        tile_set = state.tile_set
+        history = state.history
+        self.stock = state.stock
+
+        opening = state.board.mask
+        dealt = state.hand_size(self.opponent)
+        for move, side, _ in history:
+            if move != DRAW and move != PASS:
+                opening &= ~(1 << move[0])
+                if side == self.opponent:
+                    dealt += 1
+            elif move == DRAW and side == self.opponent:
+                dealt -= 1
+
+        if popcount(opening) != 1:
+            self.groups = [[0, tile_set.size, state.hand_size(self.opponent)]]
+            self.left, self.right = state.board.left_end, state.board.right_end
+            self.seen = len(history)
+        else:
+            opening_id = opening.bit_length() - 1
+            self.groups = [[0, opening_id, dealt]]
+            self.left, self.right = tile_set.tiles[opening_id]
+            self.seen = 0
+        self.merge()
+
+    def event(self, tile_set, side, move):
+        groups = self.groups
+        if move == DRAW or move == PASS:
+            if side == self.opponent:
+                voids = (1 << self.left) | (1 << self.right)
+                for group in groups:
+                    group[0] |= voids
+                if move == DRAW:
+                    groups.append([0, tile_set.size, 1])
+                self.merge()
+            return
+
+        tile_id, board_side = move
+        x, y = tile_set.tiles[tile_id]
+        if board_side == RIGHT:
+            self.right = y if x == self.right else x
+        else:
+            self.left = x if y == self.left else y
+        if side != self.opponent:
+            return
+
+        numbers = (1 << x) | (1 << y)
+        for group in groups:
+            if tile_id < group[1] and not group[0] & numbers:
+                group[2] -= 1
+                break
+        else:
+            self.groups = [[0, tile_set.size, sum(group[2] for group in groups) - 1]]
+        self.merge()
+
+    # Drop empty groups and join neighbours with the same constraints.
+    def merge(self):
+        groups = []
+        for group in self.groups:
+            if not group[2]:
+                continue
+            if groups and groups[-1][0] == group[0] and groups[-1][1] == group[1]:
+                groups[-1][2] += group[2]
+            else:
+                groups.append(group)
+        self.groups = groups
+        self.layers = self.matrix = None
+
+    # Make sure the hidden pieces can still fill every group, relaxing the constraints when they cannot.
+    def check(self, state):
+        size = state.tile_set.size
+        if sum(group[2] for group in self.groups) != state.hand_size(self.opponent):
+            self.groups = [[0, size, state.hand_size(self.opponent)]]
+            self.merge()
+        for relax in (lambda group: [0, group[1], group[2]], lambda group: [0, size, group[2]]):
+            if all(free >= count for _, free, count in self.fill_order(state)):
+                return
+            self.groups = [relax(group) for group in self.groups]
+            self.merge()
+
+    # For every group, oldest first: the bit mask of the hidden pieces it allows, how many of them are still free
+    # when the groups are filled oldest first (the older groups' slots all take pieces it allows too) and its number
+    # of slots.
+    def fill_order(self, state):
+        if self.layers is None:
+            tile_set = state.tile_set
+            hidden = tile_set.full_mask & ~(state.hands[self.observer] | state.board.mask)
+            taken = 0
+            layers = []
+            for voids, limit, count in self.groups:
+                allowed = hidden & ((1 << limit) - 1)
+                for number in iter_ids(voids):
+                    allowed &= ~tile_set.pip_masks[number]
+                layers.append((allowed, popcount(allowed) - taken, count))
+                taken += count
+            self.layers = layers
+        return self.layers
+
+    # A row per piece id with the probability of each of LOCATIONS: (0.0, 0.0) for the pieces the observer can see.
+    # Filling the groups oldest first, a piece still free when a group is filled is taken with probability
+    # count / free, so it stays in the stock with the product of 1 - count / free over the groups that allow it.
+    def probabilities(self, state):
+        self.sync(state)
+        if self.matrix is None:
+            tile_set = state.tile_set
+            layers = self.fill_order(state)
+            hidden = tile_set.full_mask & ~(state.hands[self.observer] | state.board.mask)
+            matrix = [(0.0, 0.0)] * tile_set.size
+            for tile_id in iter_ids(hidden):
+                matrix[tile_id] = (0.0, 1.0)
+
+            stays = 1.0
+            for i in range(len(layers) - 1, -1, -1):
+                allowed, free, count = layers[i]
+                stays *= 1.0 - count / free
+                # The pieces first allowed by this group are allowed by every newer group too.
+                for tile_id in iter_ids(allowed & ~(layers[i - 1][0] if i else 0)):
+                    matrix[tile_id] = (1.0 - stays, stays)
+            self.matrix = matrix
+        return self.matrix
+
+    # A full deal of the hidden pieces drawn uniformly from the ones the groups allow, without any rejection: each
+    # group takes its slots at random from its allowed pieces not taken yet, and the rest are shuffled into the stock.
+    def sample(self, state, rng=random):
+        self.sync(state)
+        hidden = state.tile_set.full_mask & ~(state.hands[self.observer] | state.board.mask)
+        opponent_hand = 0
+        for allowed, _, count in self.fill_order(state):
+            for tile_id in rng.sample(list(iter_ids(allowed & ~opponent_hand)), count):
+                opponent_hand |= 1 << tile_id
+        stock = list(iter_ids(hidden & ~opponent_hand))
+        rng.shuffle(stock)
+        return determinize(state, self.opponent, opponent_hand, stock)
@@ -0,0 +1,254 @@
+import math
+import random
+import time
+
+from .engine import DRAW, LEFT, OPPONENT, PASS, RIGHT, WINNER
+from .inference import HandTracker, determinize
+from .tiles import iter_ids, popcount
+
+WINNING_SIDE = {result: side for side, result in WINNER.items()}
+
+
+def hidden_ids(state, observer):
+    return list(iter_ids(state.tile_set.full_mask & ~(state.hands[observer] | state.board.mask)))
+
+
+# Fill in the information the observing side cannot see: the pieces that are neither in its hand nor in the snake are
+# shuffled and dealt to the opponent hand and the stock, keeping both sizes. Every deal returned is consistent with
+# what the observer has seen played and drawn. A search that samples many deals of the same state can pass the hidden
+# piece ids, smallest first, as returned by hidden_ids.
+def sample_determinization(state, observer, rng=random, hidden=None):
+    opponent = OPPONENT[observer]
+    hidden = hidden_ids(state, observer) if hidden is None else list(hidden)
+    rng.shuffle(hidden)
+    opponent_size = popcount(state.hands[opponent])
+    return determinize(state, opponent, sum(1 << tile_id for tile_id in hidden[:opponent_size]),
+                       hidden[opponent_size:])
+
+
+# Play a game out to the end with a cheap fixed policy and return the winning side, or None for a draw. Each side plays
+# its largest piece that fits (right end first), draws when nothing fits and passes when the stock is empty. The game
+# rules are the same as GameState's, but the game is played on plain integers and a copy of the played number
+# counts, so a playout never allocates a state or touches the snake.
+def rollout(state):
+    tile_set = state.tile_set
+    tiles = tile_set.tiles
+    pip_masks = tile_set.pip_masks
+    pip_sums = tile_set.pip_sums
+    pip_occurrences = tile_set.pip_occurrences
+    draw_threshold = state.draw_threshold
+
+    sides = (state.status, OPPONENT[state.status])
+    hands = [state.hands[sides[0]], state.hands[sides[1]]]
+    hand_pips = [state.hand_pips[sides[0]], state.hand_pips[sides[1]]]
+    stock = state.stock
+    stock_top = state.stock_top
+    left = state.board.left_end
+    right = state.board.right_end
+    played = list(state.board.pip_counts)
+
+    turn = 0
+    while True:
+        hand = hands[turn]
+        playable = hand & (pip_masks[left] | pip_masks[right])
+        if playable:
+            tile_id = playable.bit_length() - 1
+            x, y = tiles[tile_id]
+            hand ^= 1 << tile_id
+            hands[turn] = hand
+            hand_pips[turn] -= x + y
+            played[x] += 1
+            played[y] += 1
+            if x == right:
+                right = y
+            elif y == right:
+                right = x
+            elif y == left:
+                left = x
+            else:
+                left = y
+
+            if not hand:
+                return sides[turn]
+            if left == right and played[left] >= draw_threshold:
+                return None
+        elif stock_top:
+            stock_top -= 1
+            tile_id = stock[stock_top]
+            hands[turn] |= 1 << tile_id
+            hand_pips[turn] += pip_sums[tile_id]
+
+        if stock_top == 0 and played[left] == pip_occurrences and played[right] == pip_occurrences:
+            if hand_pips[0] == hand_pips[1]:
+                return None
+            return sides[0] if hand_pips[0] < hand_pips[1] else sides[1]
+
+        turn ^= 1
+
+
+# The moves searched by the tree: every piece that fits, or drawing/passing when nothing fits.
+def search_moves(state):
+    moves = [(tile_id, side) for tile_id, side, _ in state.placements()]
+    return moves or [DRAW if state.stock_top else PASS]
+
+
+class Node:
+    __slots__ = ('move', 'parent', 'side', 'children', 'visits', 'availability', 'reward')
+
+    def __init__(self, move=None, parent=None, side=None):
+        self.move = move
+        self.parent = parent
+        self.side = side
+        self.children = {}
+        self.visits = 0
+        self.availability = 1
+        self.reward = 0.0
+
+
+# Single-observer information set Monte Carlo tree search. Every iteration samples a deal of the hidden pieces, walks
+# the shared tree using only the moves that are legal in that deal (UCB with availability counts), adds one new node
+# and finishes the game with a fast rollout. The search stops when either the time budget (in seconds) or the number
+# of playouts runs out, whichever is set and comes first; a playout budget alone makes the strategy reproducible.
+# The subtree below the moves actually played is kept and reused on the next turn of the same game. With inference
+# the deals are sampled from a HandTracker, so they also respect what the opponent's draws, passes and the opening
+# piece give away about its hand.
+class MCTSStrategy:
+
+    def __init__(self, rng=random, time_budget=0.05, playouts=None, exploration=0.7, inference=False):
+        self.rng = rng
+        self.time_budget = time_budget
+        self.playouts = playouts
+        self.exploration = exploration
+        self.inference = inference
+        self.tracker = None
+        self.root = None
+        self.last_mask = 0
+        self.last_length = 0
+        self.last_stock_top = 0
+
+    def reset(self):
+        self.root = None
+        self.tracker = None
+
+    # Work out the opponent's move since our last decision from the snake and the stock, and return the matching
+    # subtree, or None when the tree cannot be reused (a new game or nothing known yet).
+    def reused_root(self, state):
+        if self.root is None:
+            return None
+        board = state.board
+        new_pieces = board.mask & ~self.last_mask
+        if (board.mask & self.last_mask != self.last_mask or popcount(new_pieces) > 1 or
+                len(board) != self.last_length + popcount(new_pieces)):
+            return None
+
+        if new_pieces:
+            if state.stock_top != self.last_stock_top:
+                return None
+            tile_id = new_pieces.bit_length() - 1
+            opponent_move = (tile_id, RIGHT if board.chain[-1] in (state.tile_set.tiles[tile_id],
+                                                                    state.tile_set.flipped_tiles[tile_id]) else LEFT)
+        elif state.stock_top == self.last_stock_top - 1:
+            opponent_move = DRAW
+        elif state.stock_top == self.last_stock_top == 0:
+            opponent_move = PASS
+        else:
+            return None
+
+        root = self.root.children.get(opponent_move)
+        if root is not None:
+            root.parent = None
+        return root
+
+    def choose_move(self, state):
+        moves = search_moves(state)
+        if len(moves) == 1:
+            self.root = None
+            return moves[0]
+
+        root = self.reused_root(state) or Node()
+        observer = state.status
+        tracker = None
+        if self.inference:
+            if self.tracker is None or self.tracker.observer != observer:
+                self.tracker = HandTracker(observer)
+            tracker = self.tracker.sync(state)
+        hidden = hidden_ids(state, observer)
+        deadline = time.perf_counter() + self.time_budget if self.time_budget is not None else None
+        playouts = 0
+        while True:
+            if self.playouts is not None and playouts >= self.playouts:
+                break
+            if deadline is not None and playouts % 16 == 0 and time.perf_counter() >= deadline:
+                break
+            if tracker is not None:
+                self.iterate(root, tracker.sample(state, self.rng))
+            else:
+                self.iterate(root, sample_determinization(state, observer, self.rng, hidden))
+            playouts += 1
+
+        move = max(moves, key=lambda m: root.children[m].visits if m in root.children else -1)
+        self.remember(state, root, move)
+        return move
+
+    # One playout: selection and expansion on the sampled deal, a rollout, then the result is backed up the path.
+    # Selection takes the child with the highest UCB value, its average reward plus
+    # exploration * sqrt(log(availability) / visits), worked out inline since it runs for every step of every playout.
+    def iterate(self, root, determinization):
+        exploration = self.exploration
+        log = math.log
+        sqrt = math.sqrt
+        node = root
+        while not determinization.is_terminal():
+            moves = search_moves(determinization)
+            children = node.children
+            untried = []
+            for move in moves:
+                child = children.get(move)
+                if child is None:
+                    untried.append(move)
+                else:
+                    child.availability += 1
+
+            if untried:
+                move = self.rng.choice(untried)
+                child = Node(move, node, determinization.status)
+                children[move] = child
+                determinization.apply(move)
+                node = child
+                break
+
+            best, best_value = None, 0.0
+            for move in moves:
+                child = children[move]
+                visits = child.visits
+                value = child.reward / visits + exploration * sqrt(log(child.availability) / visits)
+                if best is None or value > best_value:
+                    best, best_value = child, value
+            node = best
+            determinization.apply(node.move)
+
+        if determinization.is_terminal():
+            winner = WINNING_SIDE.get(determinization.status)
+        else:
+            winner = rollout(determinization)
+
+        while node is not None:
+            node.visits += 1
+            if winner is None:
+                node.reward += 0.5
+            elif winner == node.side:
+                node.reward += 1.0
+            node = node.parent
+
+    def remember(self, state, root, move):
+        self.root = root.children.get(move)
+        if self.root is not None:
+            self.root.parent = None
+        self.last_mask = state.board.mask
+        self.last_length = len(state.board)
+        self.last_stock_top = state.stock_top
+        if move == DRAW:
+            self.last_stock_top -= 1
+        elif move != PASS:
+            self.last_mask |= 1 << move[0]
+            self.last_length += 1
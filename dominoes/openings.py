@@ -0,0 +1,279 @@
+import argparse
+import mmap
+import os
+import random
+import struct
+from functools import partial
+
+from .engine import COMPUTER, HAND_SIZE, PLAYER, GameState
+from .evaluation import CONFIG_HOME
+from .inference import determinize
+from .mcts import WINNING_SIDE, rollout, search_moves
+from .records import RecordLayout
+from .tiles import DOUBLE_SIX, iter_ids, popcount, tile_set_for
+
+# An opening book holds the precomputed first reply of the side that did not open, for every possible deal. Since the
+# opener always plays the largest piece dealt, the replying hand only holds smaller pieces, so the opening piece and
+# the hand together are just a set of hand_size + 1 piece ids whose largest member is the opening. Each such set is
+# numbered by its rank in the combinatorial number system, which makes the book a dense array with no stored keys.
+#
+# File: a 24 byte header (magic, format version, highest number of the tile set, hand size, draw threshold, playouts
+# per situation, number of entries) followed by one 2 byte entry per situation: the best move, encoded as in game
+# records, and its estimated win rate (a draw counts as half a win) scaled to 0-254. A win rate of UNKNOWN marks a
+# situation that was not evaluated.
+MAGIC = b'DOMBOOK'
+VERSION = 1
+HEADER = struct.Struct('<7sBBBBxIQ')
+ENTRY_SIZE = 2
+UNKNOWN = 255
+
+# A generated book lives in the user's configuration directory next to the tuned weights, never inside the package.
+DEFAULT_BOOK_PATH = os.path.join(CONFIG_HOME, 'dominoes', 'opening_book.bin')
+
+
+# binomials[n][k] for every n up to the number of pieces and k up to the situation size.
+def binomial_table(pieces, size):
+    binomials = [[0] * (size + 1) for _ in range(pieces + 1)]
+    for n in range(pieces + 1):
+        binomials[n][0] = 1
+        for k in range(1, min(n, size) + 1):
+            binomials[n][k] = binomials[n - 1][k - 1] + binomials[n - 1][k]
+    return binomials
+
+
+class BookLayout:
+
+    def __init__(self, tile_set=DOUBLE_SIX, hand_size=HAND_SIZE, draw_threshold=None):
+        self.tile_set = tile_set
+        self.hand_size = hand_size
+        self.draw_threshold = tile_set.pip_occurrences if draw_threshold is None else draw_threshold
+        self.size = hand_size + 1
+        self.binomials = binomial_table(tile_set.size, self.size)
+        self.entries = self.binomials[tile_set.size][self.size]
+        self.moves = RecordLayout(tile_set)
+
+    def header(self, playouts):
+        return HEADER.pack(MAGIC, VERSION, self.tile_set.max_pip, self.hand_size, self.draw_threshold, playouts,
+                           self.entries)
+
+    # The rank of a situation: the sum of binomial(id, k) over its piece ids in increasing order, k counting from 1.
+    def index(self, opening_id, hand):
+        binomials = self.binomials
+        index = binomials[opening_id][self.size]
+        for k, tile_id in enumerate(iter_ids(hand), 1):
+            index += binomials[tile_id][k]
+        return index
+
+    # The opening piece id and hand mask of a rank, the reverse of index.
+    def situation(self, index):
+        binomials = self.binomials
+        tile_id = self.tile_set.size
+        ids = []
+        for k in range(self.size, 0, -1):
+            tile_id -= 1
+            while binomials[tile_id][k] > index:
+                tile_id -= 1
+            ids.append(tile_id)
+            index -= binomials[tile_id][k]
+        return ids[0], sum(1 << tile_id for tile_id in ids[1:])
+
+    # The book only covers the first reply of a two sided game that was dealt the way the book was built for.
+    def covers(self, state):
+        if (state.tile_set is not self.tile_set or state.draw_threshold != self.draw_threshold or
+                len(state.hands) != 2 or len(state.board) != 1 or state.stock_top != len(state.stock)):
+            return False
+        opponent = state.next_side[state.status]
+        return (popcount(state.hands[state.status]) == self.hand_size and
+                popcount(state.hands[opponent]) == self.hand_size - 1)
+
+
+# Deal the pieces the replying side cannot see. The opener held the largest piece dealt, so its remaining pieces are
+# all smaller than the opening piece, while every larger piece must be in the stock.
+def sample_reply_deal(state, smaller, larger, opponent_size, rng):
+    rng.shuffle(smaller)
+    stock = smaller[opponent_size:] + larger
+    rng.shuffle(stock)
+    return determinize(state, COMPUTER, sum(1 << tile_id for tile_id in smaller[:opponent_size]), stock)
+
+
+# Estimate the win rate of every first reply in a situation by playing each of them out in the same sampled deals of
+# the hidden pieces, with the fast rollout policy of the tree search. Returns the best move and its win rate, or None
+# for a situation no deal can lead to (too few smaller pieces left for the opener's hand).
+def evaluate_situation(layout, opening_id, hand, playouts, rng):
+    tile_set = layout.tile_set
+    opponent_size = layout.hand_size - 1
+    smaller = [tile_id for tile_id in range(opening_id) if not (hand >> tile_id) & 1]
+    if len(smaller) < opponent_size:
+        return None
+    larger = list(range(opening_id + 1, tile_set.size))
+    opponent_hand = (1 << opening_id) | sum(1 << tile_id for tile_id in smaller[:opponent_size])
+    state = GameState(hand, opponent_hand, smaller[opponent_size:] + larger, tile_set=tile_set,
+                      draw_threshold=layout.draw_threshold)
+    state.determine_starting_player()
+
+    moves = search_moves(state)
+    wins = [0.0] * len(moves)
+    for _ in range(playouts):
+        determinization = sample_reply_deal(state, smaller, larger, opponent_size, rng)
+        for i, move in enumerate(moves):
+            determinization.apply(move)
+            if determinization.is_terminal():
+                winner = WINNING_SIDE.get(determinization.status)
+            else:
+                winner = rollout(determinization)
+            wins[i] += 1.0 if winner == PLAYER else 0.5 if winner is None else 0.0
+            determinization.undo()
+
+    best = max(range(len(moves)), key=lambda i: wins[i])
+    return moves[best], wins[best] / playouts
+
+
+# Run in a worker process: the encoded entries of situations start to stop - 1. Every situation has its own seed so
+# a book comes out the same however it is split up.
+def evaluate_chunk(max_pip, hand_size, draw_threshold, playouts, seed, start, stop):
+    layout = BookLayout(tile_set_for(max_pip), hand_size, draw_threshold)
+    entries = bytearray()
+    for index in range(start, stop):
+        rng = random.Random((seed * 0x9E3779B97F4A7C15 + index) & 0xFFFFFFFFFFFFFFFF)
+        evaluation = evaluate_situation(layout, *layout.situation(index), playouts, rng)
+        if evaluation is None:
+            entries += bytes((0, UNKNOWN))
+        else:
+            move, win_rate = evaluation
+            entries += bytes((layout.moves.encode_move(move), round(win_rate * 254)))
+    return bytes(entries)
+
+
+# Build a book file. With limit set only the first limit situations are evaluated and the rest are marked UNKNOWN,
+# which is useful for trying the format out without the hour or so a full double-six book takes on one core.
+def generate_book(path, tile_set=DOUBLE_SIX, hand_size=HAND_SIZE, draw_threshold=None, playouts=16, seed=0,
+                  workers=None, chunk_size=2000, limit=None, progress=None):
+    layout = BookLayout(tile_set, hand_size, draw_threshold)
+    if layout.moves.move_width != 1:
+        raise ValueError("Opening books need moves that fit in one byte.")
+    evaluated = layout.entries if limit is None else min(limit, layout.entries)
+    chunks = [(start, min(start + chunk_size, evaluated)) for start in range(0, evaluated, chunk_size)]
+
+    # Imported here so that players of the book, which only read it, do not load multiprocessing.
+    from concurrent.futures import ProcessPoolExecutor
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with open(path, 'wb') as file, ProcessPoolExecutor(max_workers=workers) as executor:
+        file.write(layout.header(playouts))
+        evaluate = partial(evaluate_chunk, tile_set.max_pip, hand_size, layout.draw_threshold, playouts, seed)
+        results = executor.map(evaluate, [start for start, _ in chunks], [stop for _, stop in chunks])
+        for done, entries in enumerate(results, 1):
+            file.write(entries)
+            if progress is not None:
+                progress(done, len(chunks))
+        file.write(bytes((0, UNKNOWN)) * (layout.entries - evaluated))
+
+
+# A book file mapped into memory on the first lookup, so processes that never reach an opening do not pay for it
+# and processes that do share the pages with every other process using the same file.
+class OpeningBook:
+
+    def __init__(self, path=DEFAULT_BOOK_PATH):
+        self.path = path
+        self.layout = None
+        self.playouts = None
+        self.entries = None
+
+    def load(self):
+        with open(self.path, 'rb') as file:
+            magic, version, max_pip, hand_size, draw_threshold, playouts, count = HEADER.unpack(
+                file.read(HEADER.size))
+            if magic != MAGIC or version != VERSION:
+                raise ValueError(f"{self.path} is not a version {VERSION} opening book.")
+            layout = BookLayout(tile_set_for(max_pip), hand_size, draw_threshold)
+            if count != layout.entries or os.path.getsize(self.path) != HEADER.size + count * ENTRY_SIZE:
+                raise ValueError(f"{self.path} has an unexpected number of entries.")
+            self.entries = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.layout = layout
+        self.playouts = playouts
+
+    # The book move and its estimated win rate for the side to move, or None when the book does not cover the state.
+    def lookup(self, state):
+        if self.entries is None:
+            self.load()
+        layout = self.layout
+        if not layout.covers(state):
+            return None
+        opening_id = state.board.mask.bit_length() - 1
+        offset = HEADER.size + ENTRY_SIZE * layout.index(opening_id, state.hands[state.status])
+        code, win_rate = self.entries[offset], self.entries[offset + 1]
+        if win_rate == UNKNOWN:
+            return None
+        return layout.moves.decode_move(code), win_rate / 254
+
+    # The share of situations that were evaluated.
+    def coverage(self):
+        if self.entries is None:
+            self.load()
+        known = sum(1 for offset in range(HEADER.size + 1, len(self.entries), ENTRY_SIZE)
+                    if self.entries[offset] != UNKNOWN)
+        return known / self.layout.entries
+
+
+DEFAULT_BOOKS = {}
+
+
+# The book at the default path, opened once per process; None when no book has been generated.
+def default_book():
+    if DEFAULT_BOOK_PATH not in DEFAULT_BOOKS:
+        DEFAULT_BOOKS[DEFAULT_BOOK_PATH] = OpeningBook() if os.path.exists(DEFAULT_BOOK_PATH) else None
+    return DEFAULT_BOOKS[DEFAULT_BOOK_PATH]
+
+
+# Play the book move for the first reply when the book has one, and leave every other move to the wrapped strategy.
+class BookStrategy:
+
+    def __init__(self, strategy, book=None):
+        self.strategy = strategy
+        self.book = book if book is not None else default_book()
+
+    def choose_move(self, state):
+        if self.book is not None:
+            entry = self.book.lookup(state)
+            if entry is not None:
+                return entry[0]
+        return self.strategy.choose_move(state)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate or inspect the opening book of first replies.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate_parser = subparsers.add_parser('generate', help="evaluate every first reply and write a book file")
+    generate_parser.add_argument('-o', '--output', default=DEFAULT_BOOK_PATH)
+    generate_parser.add_argument('--playouts', type=int, default=16, help="sampled deals per situation")
+    generate_parser.add_argument('-s', '--seed', type=int, default=0)
+    generate_parser.add_argument('-j', '--workers', type=int, default=None)
+    generate_parser.add_argument('--chunk-size', type=int, default=2000)
+    generate_parser.add_argument('--limit', type=int, default=None, help="only evaluate this many situations")
+    generate_parser.add_argument('--max-pip', type=int, default=6)
+    generate_parser.add_argument('--hand-size', type=int, default=HAND_SIZE)
+    generate_parser.add_argument('--draw-threshold', type=int, default=None)
+
+    info_parser = subparsers.add_parser('info', help="describe a book file")
+    info_parser.add_argument('path', nargs='?', default=DEFAULT_BOOK_PATH)
+
+    args = parser.parse_args(argv)
+    if args.command == 'generate':
+        generate_book(args.output, tile_set_for(args.max_pip), args.hand_size, args.draw_threshold, args.playouts,
+                      args.seed, args.workers, args.chunk_size, args.limit,
+                      lambda done, total: print(f"\r{done}/{total} chunks", end='', flush=True))
+        print()
+    else:
+        book = OpeningBook(args.path)
+        book.load()
+        layout = book.layout
+        print(f"double-{layout.tile_set.max_pip}  hand size: {layout.hand_size}  draw threshold: "
+              f"{layout.draw_threshold}  playouts: {book.playouts}  situations: {layout.entries}  "
+              f"evaluated: {book.coverage():.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,118 @@
+import time
+
+from .board import RIGHT
+from .engine import DRAW, PASS
+
+# The phases of a console game and the methods that are timed for each of them. Names starting with state. are
+# methods of the game's GameState, so the legality and win checks the engine runs inside apply count as themselves.
+PHASES = {
+    'input_validation': ('validate_player_input',),
+    'move_legality': ('state.is_legal',),
+    'ai_scoring': ('choose_computer_move',),
+    'move': ('make_move',),
+    'win_check': ('state.check_for_win_condition',),
+    'rendering': ('game_interface',),
+}
+
+
+# Opt-in instrumentation for the Domino turn loop. Attaching a profiler replaces the phase methods of that one Domino
+# object, and of every game state it deals, with wrappers that count the calls and add up the time spent in them with
+# time.perf_counter_ns, and counts the draws from the stock, the passes and the pieces that had to be flipped to fit.
+# A phase only counts its own time: a timed call made inside another one, like the checks apply runs, is taken out
+# of the outer phase. A Domino without a profiler runs its own methods untouched, so there is no cost at all when
+# profiling is off.
+class Profiler:
+
+    def __init__(self, callback=None):
+        self.callback = callback
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.nanoseconds = dict.fromkeys(PHASES, 0)
+        self.counters = {'draws': 0, 'passes': 0, 'flips': 0}
+        # The time of the timed calls made inside the timed call that is running.
+        self.inner = [0]
+
+    def reset(self):
+        self.calls = dict.fromkeys(PHASES, 0)
+        self.nanoseconds = dict.fromkeys(PHASES, 0)
+        self.counters = {'draws': 0, 'passes': 0, 'flips': 0}
+
+    def attach(self, domino):
+        self.wrap(domino, '')
+        make_move = domino.make_move
+
+        def counted_make_move(move):
+            make_move(move)
+            self.count_move(domino.state, move)
+        domino.make_move = counted_make_move
+
+        allocate_domino_pieces = domino.allocate_domino_pieces
+
+        def timed_allocate_domino_pieces():
+            allocate_domino_pieces()
+            self.wrap(domino.state, 'state')
+        domino.allocate_domino_pieces = timed_allocate_domino_pieces
+        if domino.state is not None:
+            self.wrap(domino.state, 'state')
+
+    # Replace the methods of target that PHASES names with the given owner ('' for the Domino) by timed ones.
+    def wrap(self, target, owner):
+        for phase, method_names in PHASES.items():
+            for method_name in method_names:
+                method_owner, _, method_name = method_name.rpartition('.')
+                if method_owner == owner:
+                    setattr(target, method_name, self.timed(phase, getattr(target, method_name)))
+
+    def timed(self, phase, function):
+        calls = self.calls
+        nanoseconds = self.nanoseconds
+        inner = self.inner
+        clock = time.perf_counter_ns
+
+        def wrapper(*args, **kwargs):
+            outer_inner = inner[0]
+            inner[0] = 0
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                elapsed = clock() - start
+                nanoseconds[phase] += elapsed - inner[0]
+                calls[phase] += 1
+                inner[0] = outer_inner + elapsed
+        return wrapper
+
+    # Count a move that has just been played on the state. A piece was flipped if it joined the snake the other way
+    # round from how it is numbered in the tile set.
+    def count_move(self, state, move):
+        if move == DRAW:
+            self.counters['draws'] += 1
+        elif move == PASS:
+            self.counters['passes'] += 1
+        else:
+            tile_id, side = move
+            played_piece = state.board.chain[-1] if side == RIGHT else state.board.chain[0]
+            if played_piece != state.tile_set.tiles[tile_id]:
+                self.counters['flips'] += 1
+
+    def snapshot(self):
+        return {
+            'phases': {phase: {'calls': self.calls[phase], 'nanoseconds': self.nanoseconds[phase]} for phase in PHASES},
+            'counters': dict(self.counters),
+        }
+
+    def report(self):
+        lines = [f"{'phase':<18}{'calls':>8}{'total ms':>12}{'mean us':>12}"]
+        for phase in PHASES:
+            calls = self.calls[phase]
+            total = self.nanoseconds[phase]
+            mean = total / calls / 1e3 if calls else 0.0
+            lines.append(f"{phase:<18}{calls:>8}{total / 1e6:>12.3f}{mean:>12.2f}")
+        lines.append('  '.join(f"{name}: {count}" for name, count in self.counters.items()))
+        return '\n'.join(lines)
+
+    # Hand the current numbers to the callback, or print the report when there is no callback.
+    def export(self):
+        if self.callback is not None:
+            self.callback(self.snapshot())
+        else:
+            print(self.report())
@@ -0,0 +1,164 @@
+import os
+import struct
+
+from .engine import COMPUTER_WINS, DRAW, GAME_OVER_DRAW, HAND_SIZE, LEFT, PASS, PLAYER_WINS, RIGHT, GameState
+from .tiles import DOUBLE_SIX, tile_set_for
+
+# A game record file is a 16 byte header followed by fixed width game records, so record i always starts at
+# HEADER.size + i * record_size and a file can be memory-mapped as an array of records.
+#
+# Header: magic, format version, highest number of the tile set, bytes per move, hand size, moves per record, record
+# size and draw threshold. Files written before the hand size and draw threshold were stored have zeros there, which
+# read as the defaults.
+# Record: seed (uint64), shuffled piece ids as dealt (one byte each), result code, number of moves (uint16) and the
+# moves, padded with zeros. A piece played to the right is encoded as 2 * piece id, to the left as 2 * piece id + 1,
+# and drawing and passing use the two largest codes. Who made each move follows from the deal, since the sides
+# alternate after the opening piece.
+MAGIC = b'DOMREC'
+VERSION = 1
+HEADER = struct.Struct('<6sBBBBHHH')
+
+RESULT_CODES = {None: 0, PLAYER_WINS: 1, COMPUTER_WINS: 2, GAME_OVER_DRAW: 3}
+RESULTS = {code: result for result, code in RESULT_CODES.items()}
+
+
+class RecordLayout:
+
+    def __init__(self, tile_set=DOUBLE_SIX, max_moves=None, hand_size=HAND_SIZE, draw_threshold=None):
+        self.tile_set = tile_set
+        self.hand_size = hand_size
+        self.draw_threshold = tile_set.pip_occurrences if draw_threshold is None else draw_threshold
+        self.move_width = 1 if 2 * tile_set.size <= 254 else 2
+        self.max_moves = max_moves if max_moves is not None else 3 * tile_set.size
+        self.draw_code = (1 << (8 * self.move_width)) - 2
+        self.pass_code = self.draw_code + 1
+        move_format = 'B' if self.move_width == 1 else 'H'
+        self.record = struct.Struct(f'<Q{tile_set.size}BBH{self.max_moves}{move_format}')
+        self.record_size = self.record.size
+
+    def header(self):
+        return HEADER.pack(MAGIC, VERSION, self.tile_set.max_pip, self.move_width, self.hand_size, self.max_moves,
+                           self.record_size, self.draw_threshold)
+
+    def encode_move(self, move):
+        if move == DRAW:
+            return self.draw_code
+        if move == PASS:
+            return self.pass_code
+        tile_id, side = move
+        return 2 * tile_id + (1 if side == LEFT else 0)
+
+    def decode_move(self, code):
+        if code == self.draw_code:
+            return DRAW
+        if code == self.pass_code:
+            return PASS
+        return code >> 1, LEFT if code & 1 else RIGHT
+
+    def encode(self, seed, deal, moves, result):
+        if len(moves) > self.max_moves:
+            raise ValueError(f"A game of {len(moves)} moves does not fit in a record of {self.max_moves} moves.")
+        codes = [self.encode_move(move) for move in moves]
+        codes.extend([0] * (self.max_moves - len(codes)))
+        return self.record.pack(seed, *deal, RESULT_CODES[result], len(moves), *codes)
+
+    # The NumPy structured type of one record, matching the packed struct layout byte for byte.
+    def dtype(self):
+        import numpy as np
+
+        return np.dtype([
+            ('seed', '<u8'),
+            ('deal', 'u1', (self.tile_set.size,)),
+            ('result', 'u1'),
+            ('length', '<u2'),
+            ('moves', 'u1' if self.move_width == 1 else '<u2', (self.max_moves,)),
+        ])
+
+
+# Appends games to a record file. Encoded records are collected in memory and written in one call every
+# buffer_games games (and on flush or close), so simulations do not pay for a write per game.
+class GameRecordWriter:
+
+    def __init__(self, path, tile_set=DOUBLE_SIX, max_moves=None, buffer_games=4096, hand_size=HAND_SIZE,
+                 draw_threshold=None):
+        self.layout = RecordLayout(tile_set, max_moves, hand_size, draw_threshold)
+        self.buffer_games = buffer_games
+        self.buffer = bytearray()
+        self.buffered = 0
+        self.file = open(path, 'wb')
+        self.file.write(self.layout.header())
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def add(self, seed, deal, moves, result):
+        self.add_encoded(self.layout.encode(seed, deal, moves, result))
+
+    # Add records that were already encoded with the same layout, e.g. by a worker process.
+    def add_encoded(self, data):
+        if len(data) % self.layout.record_size:
+            raise ValueError("The data is not a whole number of records.")
+        self.buffer += data
+        self.buffered += len(data) // self.layout.record_size
+        if self.buffered >= self.buffer_games:
+            self.flush()
+
+    def flush(self):
+        self.file.write(self.buffer)
+        self.file.flush()
+        self.buffer = bytearray()
+        self.buffered = 0
+
+    def close(self):
+        if not self.file.closed:
+            self.flush()
+            self.file.close()
+
+
+# Memory-maps a record file as a NumPy structured array. Indexing returns views into the mapped file, so scanning
+# millions of games for statistics (e.g. reader.records['result']) never copies or parses them one by one.
+class GameRecordReader:
+
+    def __init__(self, path):
+        import numpy as np
+
+        with open(path, 'rb') as file:
+            (magic, version, max_pip, move_width, hand_size, max_moves, record_size,
+             draw_threshold) = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} game record file.")
+
+        self.layout = RecordLayout(tile_set_for(max_pip), max_moves, hand_size or HAND_SIZE, draw_threshold or None)
+        if self.layout.move_width != move_width or self.layout.record_size != record_size:
+            raise ValueError(f"{path} has an unexpected record layout.")
+
+        count = (os.path.getsize(path) - HEADER.size) // record_size
+        if count:
+            self.records = np.memmap(path, dtype=self.layout.dtype(), mode='r', offset=HEADER.size, shape=(count,))
+        else:
+            self.records = np.zeros(0, dtype=self.layout.dtype())
+
+    def __len__(self):
+        return len(self.records)
+
+    def __getitem__(self, index):
+        return self.records[index]
+
+    def result(self, index):
+        return RESULTS[int(self.records[index]['result'])]
+
+    def moves(self, index):
+        record = self.records[index]
+        return [self.layout.decode_move(int(code)) for code in record['moves'][:record['length']]]
+
+    # Rebuild the final state of a recorded game by replaying its moves on the engine.
+    def replay(self, index):
+        layout = self.layout
+        state = GameState.from_deal([int(tile_id) for tile_id in self.records[index]['deal']], layout.tile_set,
+                                    layout.hand_size, layout.draw_threshold)
+        for move in self.moves(index):
+            state.apply(move)
+        return state
@@ -0,0 +1,293 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from .commands import parse_command
+from .engine import COMPUTER, HAND_SIZE, PLAYER, GameState
+from .strategies import STRATEGIES
+from .tiles import tile_set_for
+
+# Line protocol. The client sends the same commands as the console game (see commands.py). "new" starts another game
+# and "quit" closes the connection. After every command the server answers with one JSON line: the game as the player
+# sees it, or {"error": ...} when the command was rejected.
+
+
+def state_message(state):
+    return {
+        'status': state.status,
+        'stock': state.stock_top,
+        'computer_pieces': state.hand_size(COMPUTER),
+        'snake': state.board.render(),
+        'ends': [state.board.left_end, state.board.right_end],
+        'hand': [list(piece) for piece in state.player_pieces],
+    }
+
+
+# The strategies cheap enough to play on the event loop. Every other strategy searches, so by default its moves are
+# computed in worker processes.
+INLINE_STRATEGIES = ('greedy', 'random', 'weighted')
+
+# Worker process side: the strategy playing each game this worker computes moves for. A game keeps its strategy from
+# move to move, so the search tree it reuses, its hand tracker and its solver's table carry over as they do inline.
+GAME_STRATEGIES = {}
+
+
+# Run in a worker process: the game's strategy, created on its first move, chooses the computer's move.
+def compute_computer_move(game, strategy_name, seed, state):
+    strategy = GAME_STRATEGIES.get(game)
+    if strategy is None:
+        strategy = GAME_STRATEGIES[game] = STRATEGIES[strategy_name](random.Random(seed))
+    return strategy.choose_move(state)
+
+
+# Run in a worker process once a game is over or abandoned.
+def forget_game(game):
+    GAME_STRATEGIES.pop(game, None)
+
+
+# One connection: the game it is playing and where the computer's strategy for that game lives, inline in strategy
+# or in the one worker process the connection is pinned to.
+class Session:
+
+    def __init__(self, worker=None):
+        self.worker = worker
+        self.game = None
+        self.state = None
+        self.strategy = None
+        self.seed = None
+
+
+# One human against computer game per connection. All sessions share one event loop; the computer's moves are either
+# computed inline (cheap strategies) or in worker processes so that a slow search never holds up other sessions.
+# Every worker is an executor of its own with one process, and a connection stays with the least busy worker when it
+# connects, so all the moves of a game are computed in the process that holds its strategy.
+class GameServer:
+
+    def __init__(self, strategy_name='greedy', workers=(), seed=None, max_pip=6, hand_size=HAND_SIZE,
+                 draw_threshold=None):
+        if strategy_name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {strategy_name!r}")
+        self.strategy_name = strategy_name
+        self.tile_set = tile_set_for(max_pip)
+        self.hand_size = hand_size
+        self.draw_threshold = draw_threshold
+        self.workers = list(workers)
+        self.worker_sessions = [0] * len(self.workers)
+        self.rng = random.Random(seed)
+        self.sessions = 0
+        self.games = 0
+
+    def connect(self):
+        if not self.workers:
+            return Session()
+        index = min(range(len(self.workers)), key=self.worker_sessions.__getitem__)
+        self.worker_sessions[index] += 1
+        return Session(index)
+
+    def disconnect(self, session):
+        self.end_game(session)
+        if session.worker is not None:
+            self.worker_sessions[session.worker] -= 1
+
+    def end_game(self, session):
+        if session.worker is not None and session.game is not None:
+            self.workers[session.worker].submit(forget_game, session.game)
+        session.game = session.state = session.strategy = None
+
+    async def computer_move(self, session):
+        if session.worker is None:
+            return session.strategy.choose_move(session.state)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.workers[session.worker], compute_computer_move, session.game,
+                                          self.strategy_name, session.seed, session.state)
+
+    async def new_game(self, session):
+        self.end_game(session)
+        self.games += 1
+        session.game = self.games
+        session.state = GameState.deal(self.rng, self.tile_set, self.hand_size, self.draw_threshold)
+        session.seed = self.rng.getrandbits(64)
+        if session.worker is None:
+            session.strategy = STRATEGIES[self.strategy_name](random.Random(session.seed))
+        await self.play_computer_turns(session)
+
+    async def play_computer_turns(self, session):
+        state = session.state
+        while not state.is_terminal() and state.status == COMPUTER:
+            state.apply(await self.computer_move(session))
+
+    async def handle(self, reader, writer):
+        self.sessions += 1
+        session = self.connect()
+        try:
+            await self.new_game(session)
+            await self.send(writer, state_message(session.state))
+
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                command = line.decode(errors='replace').strip()
+                if command == 'quit':
+                    break
+                if command == 'new':
+                    await self.new_game(session)
+                    await self.send(writer, state_message(session.state))
+                    continue
+                state = session.state
+                if state.is_terminal():
+                    await self.send(writer, {'error': "The game is over. Send 'new' to play again."})
+                    continue
+
+                try:
+                    move = parse_command(command, state)
+                except ValueError as error:
+                    await self.send(writer, {'error': str(error)})
+                    continue
+                state.apply(move)
+                await self.play_computer_turns(session)
+                await self.send(writer, state_message(state))
+        except ConnectionError:
+            pass
+        finally:
+            self.sessions -= 1
+            self.disconnect(session)
+            writer.close()
+
+    async def send(self, writer, message):
+        writer.write(json.dumps(message).encode() + b'\n')
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8765):
+        server = await asyncio.start_server(self.handle, host, port, backlog=4096)
+        async with server:
+            await server.serve_forever()
+
+
+# The move a load testing client sends: the first piece that fits the right end, else the first that fits the left
+# end, else 0.
+def client_command(message):
+    left, right = message['ends']
+    for number, (x, y) in enumerate(message['hand'], 1):
+        if x == right or y == right:
+            return str(number)
+    for number, (x, y) in enumerate(message['hand'], 1):
+        if x == left or y == left:
+            return str(-number)
+    return '0'
+
+
+async def load_client(host, port, games, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        message = json.loads(await reader.readline())
+        for game in range(games):
+            if game:
+                writer.write(b'new\n')
+                message = json.loads(await reader.readline())
+            while message.get('status') == PLAYER:
+                start = time.perf_counter()
+                writer.write(client_command(message).encode() + b'\n')
+                message = json.loads(await reader.readline())
+                latencies.append(time.perf_counter() - start)
+        writer.write(b'quit\n')
+        await writer.drain()
+    finally:
+        writer.close()
+
+
+# Open the given number of simultaneous connections, play the games and report the move latency percentiles.
+async def load_test(host='127.0.0.1', port=8765, clients=1000, games=1):
+    latencies = []
+    start = time.perf_counter()
+    results = await asyncio.gather(*(load_client(host, port, games, latencies) for _ in range(clients)),
+                                   return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    failures = sum(1 for result in results if isinstance(result, Exception))
+
+    if not latencies:
+        return f"clients: {clients}  failed: {failures}  no moves were measured"
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p99 = latencies[min(len(latencies) - 1, int(0.99 * len(latencies)))]
+    return (f"clients: {clients}  failed: {failures}  moves: {len(latencies)}  moves/second: "
+            f"{len(latencies) / elapsed:.0f}  p50: {p50 * 1e3:.2f} ms  p99: {p99 * 1e3:.2f} ms  "
+            f"max: {latencies[-1] * 1e3:.2f} ms")
+
+
+def add_serve_arguments(parser):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--strategy', default='greedy', choices=sorted(STRATEGIES))
+    parser.add_argument('--workers', type=int, default=None,
+                        help="compute computer moves in this many worker processes, 0 for inline (default: inline for "
+                             f"{', '.join(INLINE_STRATEGIES)}, otherwise one per core)")
+    parser.add_argument('--seed', type=int, default=None)
+    parser.add_argument('--max-pip', type=int, default=6, help="play with a double-N set (default: double-six)")
+    parser.add_argument('--hand-size', type=int, default=HAND_SIZE)
+    parser.add_argument('--draw-threshold', type=int, default=None)
+
+
+def add_load_arguments(parser):
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('-c', '--clients', type=int, default=1000)
+    parser.add_argument('-g', '--games', type=int, default=1, help="games per client")
+
+
+def serve(args):
+    workers = args.workers
+    if workers is None:
+        workers = 0 if args.strategy in INLINE_STRATEGIES else os.cpu_count() or 1
+    executors = [ProcessPoolExecutor(max_workers=1) for _ in range(workers)]
+    try:
+        # Start the worker processes before the server socket is opened, so they do not inherit it.
+        for executor in executors:
+            executor.submit(forget_game, None).result()
+        server = GameServer(args.strategy, executors, args.seed, args.max_pip, args.hand_size, args.draw_threshold)
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for executor in executors:
+            executor.shutdown()
+
+
+def load(args):
+    print(asyncio.run(load_test(args.host, args.port, args.clients, args.games)))
+
+
+# The entry points of dominoes serve and dominoes load.
+def serve_main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many human against computer domino games on one event loop.")
+    add_serve_arguments(parser)
+    serve(parser.parse_args(argv))
+
+
+def load_main(argv=None):
+    parser = argparse.ArgumentParser(description="Play many simultaneous games against a game server and report the "
+                                                 "move latencies.")
+    add_load_arguments(parser)
+    load(parser.parse_args(argv))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Host many human against computer domino games on one event loop.")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    add_serve_arguments(subparsers.add_parser('serve', help="run the game server"))
+    add_load_arguments(subparsers.add_parser('load', help="run the load generating client against a server"))
+
+    args = parser.parse_args(argv)
+    if args.command == 'serve':
+        serve(args)
+    else:
+        load(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,236 @@
+import random
+
+from .board import LEFT, RIGHT
+from .engine import OPPONENT
+from .tiles import DOUBLE_SIX, iter_ids, popcount
+
+WIN = 1
+DRAWN = 0
+LOSS = -1
+
+EXACT = 0
+LOWER_BOUND = 1
+UPPER_BOUND = 2
+
+
+# A fixed size transposition table. Each index has two slots: the first keeps the entry with the most pieces left to
+# play (the most expensive one to search again) and the second always takes the newest entry, so the memory used
+# never grows past 2 * size entries however long the solver runs.
+class TranspositionTable:
+
+    def __init__(self, size=1 << 18):
+        if size & (size - 1):
+            raise ValueError("The transposition table size must be a power of two.")
+        self.size = size
+        self.index_mask = size - 1
+        self.deep = [None] * size
+        self.recent = [None] * size
+
+    def clear(self):
+        self.deep = [None] * self.size
+        self.recent = [None] * self.size
+
+    def probe(self, key):
+        index = key & self.index_mask
+        entry = self.deep[index]
+        if entry is not None and entry[0] == key:
+            return entry
+        entry = self.recent[index]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(self, key, depth, value, flag, move):
+        index = key & self.index_mask
+        entry = (key, depth, value, flag, move)
+        deep_entry = self.deep[index]
+        if deep_entry is None or deep_entry[0] == key or depth >= deep_entry[1]:
+            self.deep[index] = entry
+        else:
+            self.recent[index] = entry
+
+
+# Exact alpha-beta (negamax) solver for the end of a game. Once the stock is empty the pieces the side to move cannot
+# see are exactly the opponent's hand, so the rest of the game has no hidden information and a position is fully
+# described by the two hands and the two open ends. Positions are hashed with Zobrist keys that are updated as moves
+# are made, and moves are tried best first: the transposition table move, then by the same pip count score as
+# computer_ai_algorithm. Values are WIN, DRAWN or LOSS for the side to move.
+class EndgameSolver:
+
+    def __init__(self, tile_set=DOUBLE_SIX, table_size=1 << 18, seed=0, draw_threshold=None):
+        self.tile_set = tile_set
+        self.draw_threshold = tile_set.pip_occurrences if draw_threshold is None else draw_threshold
+        self.table = TranspositionTable(table_size)
+        rng = random.Random(seed)
+        self.hand_keys = [[rng.getrandbits(64) for _ in range(tile_set.size)] for _ in range(2)]
+        self.left_keys = [rng.getrandbits(64) for _ in range(tile_set.max_pip + 1)]
+        self.right_keys = [rng.getrandbits(64) for _ in range(tile_set.max_pip + 1)]
+        self.turn_key = rng.getrandbits(64)
+        self.nodes = 0
+
+    # The solver only applies to running games with an empty stock and at most threshold pieces left in the hands.
+    def can_solve(self, state, threshold):
+        if state.is_terminal() or state.stock_top != 0:
+            return False
+        return popcount(state.hands[state.status] | state.hands[OPPONENT[state.status]]) <= threshold
+
+    def hash_key(self, hands, turn, left, right):
+        key = self.left_keys[left] ^ self.right_keys[right]
+        if turn:
+            key ^= self.turn_key
+        for side in (0, 1):
+            for tile_id in iter_ids(hands[side]):
+                key ^= self.hand_keys[side][tile_id]
+        return key
+
+    # Return (value, move) for the side to move, where move is an engine move.
+    def solve(self, state):
+        if state.tile_set is not self.tile_set or state.draw_threshold != self.draw_threshold:
+            raise ValueError("The solver was built for a different tile set or draw threshold.")
+        if state.stock_top != 0:
+            raise ValueError("The endgame solver needs an empty stock.")
+
+        hands = [state.hands[state.status], state.hands[OPPONENT[state.status]]]
+        left, right = state.board.left_end, state.board.right_end
+        key = self.hash_key(hands, 0, left, right)
+        moves = self.ordered_moves(hands[0], hands[1], left, right, None)
+        if not moves:
+            return -self.search(hands, 1, left, right, key ^ self.turn_key, -2, 2), state.legal_moves()[-1]
+
+        alpha = -2
+        best_value, best_move = -2, None
+        for move in moves:
+            value = self.move_value(hands, 0, left, right, key, move, alpha, 2)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if best_value == WIN:
+                break
+        return best_value, (best_move[0], best_move[1])
+
+    # Every (tile id, side, new left end, new right end) the hand can play, best first. When both ends show the same
+    # number a piece is only listed once, since both sides lead to the same position.
+    def ordered_moves(self, hand, other, left, right, first_move):
+        tile_set = self.tile_set
+        pip_masks = tile_set.pip_masks
+        tiles = tile_set.tiles
+        pip_occurrences = tile_set.pip_occurrences
+
+        moves = []
+        for tile_id in iter_ids(hand & (pip_masks[left] | pip_masks[right])):
+            x, y = tiles[tile_id]
+            if x == right or y == right:
+                moves.append((tile_id, RIGHT, left, y if x == right else x))
+            if left != right and (x == left or y == left):
+                moves.append((tile_id, LEFT, y if x == left else x, right))
+
+        def score(move):
+            if first_move is not None and move[0] == first_move[0] and move[1] == first_move[1]:
+                return 1000
+            x, y = tiles[move[0]]
+            return (pip_occurrences - tile_set.pip_count(other, x)) + (pip_occurrences - tile_set.pip_count(other, y))
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    # The value of a finished game after the side to move played its last move, or None if the game goes on.
+    def outcome(self, hand, other, left, right):
+        tile_set = self.tile_set
+        pip_masks = tile_set.pip_masks
+        if hand == 0:
+            return WIN
+        remaining = hand | other
+        if left == right and tile_set.pip_occurrences - tile_set.pip_count(remaining, left) >= self.draw_threshold:
+            return DRAWN
+        if remaining & (pip_masks[left] | pip_masks[right]) == 0:
+            hand_pips = tile_set.pip_total(hand)
+            other_pips = tile_set.pip_total(other)
+            if hand_pips == other_pips:
+                return DRAWN
+            return WIN if hand_pips < other_pips else LOSS
+        return None
+
+    def move_value(self, hands, turn, left, right, key, move, alpha, beta):
+        tile_id, _, new_left, new_right = move
+        hand = hands[turn]
+        new_hand = hand & ~(1 << tile_id)
+        value = self.outcome(new_hand, hands[1 - turn], new_left, new_right)
+        if value is not None:
+            return value
+
+        child_key = (key ^ self.hand_keys[turn][tile_id] ^ self.left_keys[left] ^ self.left_keys[new_left] ^
+                     self.right_keys[right] ^ self.right_keys[new_right] ^ self.turn_key)
+        hands[turn] = new_hand
+        value = -self.search(hands, 1 - turn, new_left, new_right, child_key, -beta, -alpha)
+        hands[turn] = hand
+        return value
+
+    def search(self, hands, turn, left, right, key, alpha, beta):
+        self.nodes += 1
+        original_alpha = alpha
+        first_move = None
+        entry = self.table.probe(key)
+        if entry is not None:
+            _, _, value, flag, first_move = entry
+            if flag == EXACT:
+                return value
+            elif flag == LOWER_BOUND:
+                alpha = max(alpha, value)
+            else:
+                beta = min(beta, value)
+            if alpha >= beta:
+                return value
+
+        hand, other = hands[turn], hands[1 - turn]
+        moves = self.ordered_moves(hand, other, left, right, first_move)
+        if not moves:
+            return -self.search(hands, 1 - turn, left, right, key ^ self.turn_key, -beta, -alpha)
+
+        best_value, best_move = -2, None
+        for move in moves:
+            value = self.move_value(hands, turn, left, right, key, move, alpha, beta)
+            if value > best_value:
+                best_value, best_move = value, move
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        if best_value <= original_alpha:
+            flag = UPPER_BOUND
+        elif best_value >= beta:
+            flag = LOWER_BOUND
+        else:
+            flag = EXACT
+        self.table.store(key, popcount(hand | other), best_value, flag, best_move)
+        return best_value
+
+
+SHARED_SOLVERS = {}
+
+
+# One solver per tile set and draw threshold, built once per process. Its transposition table stays valid from game
+# to game, since with an empty stock the two hands and the open ends decide everything about a position.
+def shared_solver(tile_set=DOUBLE_SIX, draw_threshold=None):
+    key = tile_set.max_pip, tile_set.pip_occurrences if draw_threshold is None else draw_threshold
+    if key not in SHARED_SOLVERS:
+        SHARED_SOLVERS[key] = EndgameSolver(tile_set, draw_threshold=draw_threshold)
+    return SHARED_SOLVERS[key]
+
+
+# Play the proven best move once the endgame is small enough to solve, and leave every other move to the wrapped
+# strategy. Without a solver of its own, or when a game with a different tile set or draw threshold comes along, the
+# shared solver of the game's tile set is used.
+class EndgameStrategy:
+
+    def __init__(self, strategy, threshold=14, solver=None):
+        self.strategy = strategy
+        self.threshold = threshold
+        self.solver = solver
+
+    def choose_move(self, state):
+        solver = self.solver
+        if solver is None or state.tile_set is not solver.tile_set or state.draw_threshold != solver.draw_threshold:
+            solver = self.solver = shared_solver(state.tile_set, state.draw_threshold)
+        if solver.can_solve(state, self.threshold):
+            return solver.solve(state)[1]
+        return self.strategy.choose_move(state)
@@ -0,0 +1,65 @@
+import random
+
+from .engine import DRAW, PASS
+from .evaluation import WeightedStrategy
+from .mcts import MCTSStrategy
+from .openings import BookStrategy
+from .solver import EndgameStrategy
+from .tiles import iter_ids
+
+
+# Score every piece in the hand of the given side by how often its two numbers appear among the pieces that side can
+# see (its own hand plus the snake). Pieces with common numbers are the safest to get rid of first. The scores are
+# listed in the same order as the pieces in the hand, from the smallest piece to the largest. The counts come from
+# the running table the game state keeps, so only the hand itself is looked at.
+def computer_ai_algorithm(state, side):
+    count_list = state.pip_counts[side]
+    tiles = state.tile_set.tiles
+
+    return [count_list[tiles[tile_id][0]] + count_list[tiles[tile_id][1]] for tile_id in iter_ids(state.hands[side])]
+
+
+# The original computer opponent: play the highest scoring piece that fits (right end first, then left end), and
+# draw or pass when nothing fits. Ties go to the smaller piece. Only the pieces that fit are scored, in one pass over
+# the placements of the hand.
+class GreedyStrategy:
+
+    def choose_move(self, state):
+        counts = state.pip_counts[state.status]
+        best_move, best_score = None, -1
+        for tile_id, side, (x, y) in state.placements():
+            score = counts[x] + counts[y]
+            if score > best_score:
+                best_move, best_score = (tile_id, side), score
+        if best_move is None:
+            return DRAW if state.stock_top else PASS
+        return best_move
+
+
+# A baseline opponent that plays a uniformly random piece that fits, and draws or passes when nothing fits.
+class RandomStrategy:
+
+    def __init__(self, rng=random):
+        self.rng = rng
+
+    def choose_move(self, state):
+        moves = state.legal_moves()
+        if len(moves) > 1:
+            return self.rng.choice(moves[:-1])
+        return moves[0]
+
+
+# Strategy factories by name, used by the tournament runner and the command line. Each factory takes the random
+# number generator of the game it is about to play so that results are reproducible, which is why the registered
+# search strategies use a playout budget rather than a time budget. The -book strategies play the first reply from
+# the opening book at openings.DEFAULT_BOOK_PATH once one has been generated (see openings.py).
+STRATEGIES = {
+    'greedy': lambda rng: GreedyStrategy(),
+    'random': lambda rng: RandomStrategy(rng),
+    'mcts': lambda rng: MCTSStrategy(rng, time_budget=None, playouts=200),
+    'greedy-endgame': lambda rng: EndgameStrategy(GreedyStrategy()),
+    'weighted': lambda rng: WeightedStrategy(),
+    'greedy-book': lambda rng: BookStrategy(GreedyStrategy()),
+    'mcts-book': lambda rng: BookStrategy(MCTSStrategy(rng, time_budget=None, playouts=200)),
+    'mcts-inference': lambda rng: MCTSStrategy(rng, time_budget=None, playouts=200, inference=True),
+}
@@ -0,0 +1,207 @@
+import argparse
+import random
+import time
+
+from .commands import parse_command
+from .engine import GAME_OVER_DRAW, HAND_SIZE, GameState, shuffle_domino_set
+from .strategies import STRATEGIES
+from .tiles import DOUBLE_SIX, tile_set_for
+from .tournament import play_game
+
+TEAM_WINS = 'team_wins'
+
+MIN_SEATS = 2
+MAX_SEATS = 4
+
+# Seat to team for a four seat partnership game: partners sit opposite each other.
+PARTNERSHIPS = (0, 1, 0, 1)
+
+# The strategies that only rely on the interface TableState shares with GameState. The search strategies assume a
+# two sided game.
+TABLE_STRATEGIES = ('greedy', 'random', 'weighted')
+
+
+# Slice a shuffled domino set into one hand per seat and the stock.
+def allocate_table_pieces(domino_set, seats, hand_size):
+    if not MIN_SEATS <= seats <= MAX_SEATS:
+        raise ValueError(f"A table has {MIN_SEATS} to {MAX_SEATS} seats, not {seats}.")
+    if not 1 <= hand_size <= len(domino_set) // seats:
+        raise ValueError(f"Cannot deal {seats} hands of {hand_size} pieces from a set of {len(domino_set)} pieces.")
+    hands = [list(domino_set[seat * hand_size:(seat + 1) * hand_size]) for seat in range(seats)]
+    return hands, list(domino_set[seats * hand_size:])
+
+
+# A game for 2 to 4 seats. The seats are numbered from 0 and play in that order; hands, pip_counts, hand_pips and
+# voids are keyed by seat, and the status is the seat to move while the game is running. Everything but the end of
+# the game is GameState's own, so the same strategies can play any seat.
+#
+# teams gives the team of every seat (by default every seat plays for itself; see PARTNERSHIPS). A team wins as soon
+# as one of its seats has played all of its pieces. A blocked game goes to the team of the seat with the fewest pips
+# left in hand, and is a draw when seats of different teams share the fewest. The winning team is kept in winner.
+class TableState(GameState):
+
+    def __init__(self, hands, stock, stock_top=None, board=None, status=None, tile_set=DOUBLE_SIX,
+                 draw_threshold=None, teams=None):
+        seats = len(hands)
+        if not MIN_SEATS <= seats <= MAX_SEATS:
+            raise ValueError(f"A table has {MIN_SEATS} to {MAX_SEATS} seats, not {seats}.")
+        if teams is not None and len(teams) != seats:
+            raise ValueError(f"Expected a team for each of the {seats} seats.")
+
+        self.teams = tuple(range(seats)) if teams is None else tuple(teams)
+        self.next_side = tuple((seat + 1) % seats for seat in range(seats))
+        self.others = tuple(tuple(other for other in range(seats) if other != seat) for seat in range(seats))
+        self.winner = None
+        self.setup(dict(enumerate(hands)), stock, stock_top, board, status, tile_set, draw_threshold)
+
+    # Create a freshly shuffled and dealt table with the opening piece already played. Without a hand size every
+    # seat gets seven pieces, or an equal share of the set when seven each would not fit.
+    @classmethod
+    def deal(cls, rng=random, seats=4, tile_set=DOUBLE_SIX, hand_size=None, draw_threshold=None, teams=None):
+        domino_set = list(range(tile_set.size))
+        shuffle_domino_set(domino_set, rng)
+        return cls.from_deal(domino_set, seats, tile_set, hand_size, draw_threshold, teams)
+
+    @classmethod
+    def from_deal(cls, deal, seats=4, tile_set=DOUBLE_SIX, hand_size=None, draw_threshold=None, teams=None):
+        if hand_size is None:
+            hand_size = min(HAND_SIZE, len(deal) // seats)
+        hands, stock = allocate_table_pieces(deal, seats, hand_size)
+        state = cls([sum(1 << tile_id for tile_id in hand) for hand in hands], stock, tile_set=tile_set,
+                    draw_threshold=draw_threshold, teams=teams)
+        state.determine_starting_player()
+        return state
+
+    @property
+    def seats(self):
+        return len(self.hands)
+
+    def pieces(self, seat):
+        return self.tile_set.tiles_in(self.hands[seat])
+
+    def copy(self, history=True):
+        state = super().copy(history)
+        state.teams = self.teams
+        state.next_side = self.next_side
+        state.others = self.others
+        state.winner = self.winner
+        return state
+
+    # A move that ended the game can be undone, so the winner is cleared with it.
+    def undo(self):
+        move = super().undo()
+        self.winner = None
+        return move
+
+    # Called by apply before the turn passes on, so only the seat that just moved can have emptied its hand.
+    def check_for_win_condition(self):
+        if self.hands[self.status] == 0:
+            self.winner = self.teams[self.status]
+            self.status = TEAM_WINS
+            return True
+        elif (self.board.left_end == self.board.right_end and
+              self.board.pip_counts[self.board.left_end] >= self.draw_threshold):
+            self.status = GAME_OVER_DRAW
+            return True
+        elif self.stock_top == 0 and self.board.is_blocked():
+            fewest = min(self.hand_pips.values())
+            teams = {self.teams[seat] for seat, pips in self.hand_pips.items() if pips == fewest}
+            if len(teams) == 1:
+                self.winner = teams.pop()
+                self.status = TEAM_WINS
+            else:
+                self.status = GAME_OVER_DRAW
+            return True
+        return False
+
+    def is_terminal(self):
+        return self.status in (TEAM_WINS, GAME_OVER_DRAW)
+
+
+# A human seat at the console. It shows the table from its own seat and takes the same commands as the two player
+# console game.
+class ConsoleSeat:
+
+    def choose_move(self, state):
+        seat = state.status
+        print("=" * 70)
+        print("Stock size:", state.stock_top)
+        for other in range(seat + 1, seat + state.seats):
+            other %= state.seats
+            partner = " (partner)" if state.teams[other] == state.teams[seat] else ""
+            print(f"Seat {other} pieces{partner}:", state.hand_size(other))
+        print()
+        print(state.board.render())
+        print()
+        print(f"Your pieces (seat {seat}):")
+        for i, domino in enumerate(state.pieces(seat), 1):
+            print(i, list(domino), sep=':')
+        print("\n""Status: It's your turn to make a move. Enter your command.")
+
+        while True:
+            try:
+                return parse_command(input(), state, seat)
+            except ValueError as error:
+                print(error)
+
+
+def describe_result(state):
+    if state.status == GAME_OVER_DRAW:
+        return "The game is over. It's a draw!"
+    members = [seat for seat, team in enumerate(state.teams) if team == state.winner]
+    if len(members) == 1:
+        return f"The game is over. Seat {members[0]} won!"
+    return f"The game is over. Seats {' and '.join(map(str, members))} won!"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play dominoes at a table of 2 to 4 human or computer seats.")
+    parser.add_argument('--seats', type=int, default=4)
+    parser.add_argument('--humans', type=int, default=1, help="the first seats are played at the console")
+    parser.add_argument('--partnerships', action='store_true', help="four seats playing as two teams")
+    parser.add_argument('--strategy', default='greedy', choices=TABLE_STRATEGIES)
+    parser.add_argument('-n', '--games', type=int, default=1, help="games to play when no seat is human")
+    parser.add_argument('-s', '--seed', type=int, default=None)
+    parser.add_argument('--max-pip', type=int, default=6, help="play with a double-N set (default: double-six)")
+    parser.add_argument('--hand-size', type=int, default=None)
+    parser.add_argument('--draw-threshold', type=int, default=None)
+    args = parser.parse_args(argv)
+
+    if args.partnerships and args.seats != len(PARTNERSHIPS):
+        parser.error(f"partnerships need {len(PARTNERSHIPS)} seats")
+    if not 0 <= args.humans <= args.seats:
+        parser.error("there are more human seats than seats")
+    if args.games < 1:
+        parser.error("at least one game has to be played")
+    teams = PARTNERSHIPS if args.partnerships else None
+    tile_set = tile_set_for(args.max_pip)
+    rng = random.Random(args.seed)
+    seats = [ConsoleSeat() for _ in range(args.humans)]
+    seats += [STRATEGIES[args.strategy](rng) for _ in range(args.seats - args.humans)]
+
+    if args.humans:
+        state, _ = play_game(TableState.deal(rng, args.seats, tile_set, args.hand_size, args.draw_threshold, teams),
+                             seats)
+        print("=" * 70)
+        print(state.board.render())
+        print("\n""Status:", describe_result(state))
+        return
+
+    wins = [0] * (max(teams) + 1 if teams else args.seats)
+    draws = moves = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        state, turns = play_game(TableState.deal(rng, args.seats, tile_set, args.hand_size, args.draw_threshold,
+                                                 teams), seats)
+        moves += turns
+        if state.status == TEAM_WINS:
+            wins[state.winner] += 1
+        elif state.is_terminal():
+            draws += 1
+    elapsed = time.perf_counter() - start
+    print(f"games: {args.games}  wins by team: {wins}  draws: {draws}  "
+          f"average length: {moves / args.games:.2f}  moves/second: {moves / elapsed:.0f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,77 @@
+# Every piece of a double-N set gets a fixed integer id, in the same order as the set is generated, so that a hand,
+# the stock or the pieces in the snake can each be stored as a single integer with one bit per piece. Because the
+# pieces are generated in increasing order, a higher id always means a larger piece.
+MIN_PIP = 6
+MAX_PIP = 18
+
+
+class TileSet:
+
+    def __init__(self, max_pip=6):
+        if not MIN_PIP <= max_pip <= MAX_PIP:
+            raise ValueError(f"Only double-{MIN_PIP} to double-{MAX_PIP} sets are supported, not double-{max_pip}.")
+        self.max_pip = max_pip
+        self.tiles = [(x, y) for x in range(max_pip + 1) for y in range(x + 1)]
+        self.flipped_tiles = [(y, x) for x, y in self.tiles]
+        self.size = len(self.tiles)
+        self.full_mask = (1 << self.size) - 1
+        self.pip_occurrences = max_pip + 2
+        self.pip_sums = [x + y for x, y in self.tiles]
+        self.strings = {piece: str(list(piece)) for piece in self.tiles + self.flipped_tiles}
+
+        self.ids = {}
+        self.pip_masks = [0] * (max_pip + 1)
+        self.double_ids = [0] * (max_pip + 1)
+        for tile_id, (x, y) in enumerate(self.tiles):
+            self.ids[(x, y)] = tile_id
+            self.ids[(y, x)] = tile_id
+            self.pip_masks[x] |= 1 << tile_id
+            self.pip_masks[y] |= 1 << tile_id
+            if x == y:
+                self.double_ids[x] = tile_id
+
+    # Pickled tile sets (e.g. states sent to worker processes) unpickle as the shared tile set of the same size.
+    def __reduce__(self):
+        return tile_set_for, (self.max_pip,)
+
+    def mask(self, tiles):
+        mask = 0
+        for tile in tiles:
+            mask |= 1 << self.ids[tuple(tile)]
+        return mask
+
+    def tiles_in(self, mask):
+        return [self.tiles[tile_id] for tile_id in iter_ids(mask)]
+
+    def pip_total(self, mask):
+        return sum(self.pip_sums[tile_id] for tile_id in iter_ids(mask))
+
+    # How many times a number appears on the pieces in the mask. A double shows the number twice.
+    def pip_count(self, mask, pip):
+        return popcount(mask & self.pip_masks[pip]) + ((mask >> self.double_ids[pip]) & 1)
+
+
+def popcount(mask):
+    return mask.bit_count()
+
+
+# Yield the ids of the pieces in a mask from the smallest piece to the largest.
+def iter_ids(mask):
+    while mask:
+        lowest_bit = mask & -mask
+        yield lowest_bit.bit_length() - 1
+        mask ^= lowest_bit
+
+
+TILE_SETS = {}
+
+
+# The shared tile set for a double-N set. Tile sets are only built once, so states of the same set share their tables
+# and can compare tile sets by identity.
+def tile_set_for(max_pip):
+    if max_pip not in TILE_SETS:
+        TILE_SETS[max_pip] = TileSet(max_pip)
+    return TILE_SETS[max_pip]
+
+
+DOUBLE_SIX = tile_set_for(6)
@@ -0,0 +1,192 @@
+import argparse
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .engine import COMPUTER, COMPUTER_WINS, HAND_SIZE, PLAYER, PLAYER_WINS, GameState, shuffle_domino_set
+from .records import GameRecordWriter, RecordLayout
+from .strategies import STRATEGIES
+from .tiles import tile_set_for
+
+
+# Running totals for a batch of games between strategy A and strategy B. Only these counters (and, when games are
+# recorded, their encoded binary records) travel between the worker processes and the parent, never the games
+# themselves.
+class TournamentResult:
+
+    def __init__(self):
+        self.games = 0
+        self.a_wins = 0
+        self.b_wins = 0
+        self.draws = 0
+        self.unfinished = 0
+        self.turns = 0
+        self.pips_left = 0
+        self.records = b''
+
+    def merge(self, other):
+        self.games += other.games
+        self.a_wins += other.a_wins
+        self.b_wins += other.b_wins
+        self.draws += other.draws
+        self.unfinished += other.unfinished
+        self.turns += other.turns
+        self.pips_left += other.pips_left
+        return self
+
+    def average_length(self):
+        return self.turns / self.games if self.games else 0.0
+
+    def average_pips_left(self):
+        return self.pips_left / self.games if self.games else 0.0
+
+    def summary(self):
+        return (f"games: {self.games}  A wins: {self.a_wins}  B wins: {self.b_wins}  draws: {self.draws}  "
+                f"unfinished: {self.unfinished}  average length: {self.average_length():.2f}  "
+                f"average pips left: {self.average_pips_left():.2f}")
+
+
+# Every game gets its own 64 bit seed derived from the tournament seed and the game number, so a game is played the
+# same way whichever worker ends up playing it, and a recorded game can be dealt again from its seed.
+def game_seed(seed, game_index):
+    return (seed * 0x9E3779B97F4A7C15 + game_index) & 0xFFFFFFFFFFFFFFFF
+
+
+# Play one game to the end and return the finished state and the number of moves played. Games that are still
+# running after max_turns moves are abandoned. If a moves list is given every move played is appended to it.
+def play_game(state, strategies, max_turns=1000, moves=None):
+    turns = 0
+    while not state.is_terminal() and turns < max_turns:
+        move = strategies[state.status].choose_move(state)
+        state.apply(move)
+        if moves is not None:
+            moves.append(move)
+        turns += 1
+    return state, turns
+
+
+# Play games start to stop - 1. Strategy A takes the player seat in even games and the computer seat in odd games so
+# that neither strategy profits from the deal order. With record set, the games are also encoded as binary game
+# records (see records.py) in result.records. The set is given by its highest number rather than a TileSet so that
+# worker processes use their own shared tile set.
+def play_chunk(strategy_a, strategy_b, seed, start, stop, max_turns=1000, record=False, max_pip=6,
+               hand_size=HAND_SIZE, draw_threshold=None):
+    result = TournamentResult()
+    make_a = STRATEGIES[strategy_a]
+    make_b = STRATEGIES[strategy_b]
+    tile_set = tile_set_for(max_pip)
+    layout = RecordLayout(tile_set, None, hand_size, draw_threshold) if record else None
+    records = bytearray()
+
+    for game_index in range(start, stop):
+        rng = random.Random(game_seed(seed, game_index))
+        deal = list(range(tile_set.size))
+        shuffle_domino_set(deal, rng)
+        state = GameState.from_deal(deal, tile_set, hand_size, draw_threshold)
+        if game_index % 2 == 0:
+            seats = {PLAYER: make_a(rng), COMPUTER: make_b(rng)}
+            a_wins, b_wins = PLAYER_WINS, COMPUTER_WINS
+        else:
+            seats = {PLAYER: make_b(rng), COMPUTER: make_a(rng)}
+            a_wins, b_wins = COMPUTER_WINS, PLAYER_WINS
+
+        moves = [] if record else None
+        state, turns = play_game(state, seats, max_turns, moves)
+        status = state.result()
+        if record:
+            records += layout.encode(game_seed(seed, game_index), deal, moves, status)
+        result.games += 1
+        result.turns += turns
+        result.pips_left += sum(state.hand_pips.values())
+        if status == a_wins:
+            result.a_wins += 1
+        elif status == b_wins:
+            result.b_wins += 1
+        elif status is None:
+            result.unfinished += 1
+        else:
+            result.draws += 1
+
+    result.records = bytes(records)
+    return result
+
+
+# Play the tournament and yield the running totals each time a chunk of games finishes. With workers set to 1 the
+# games are played in this process, otherwise they are spread over a process pool. If a GameRecordWriter is given
+# every game is recorded to it, in the order the chunks finish.
+def iter_tournament(strategy_a, strategy_b, games, seed=0, workers=None, chunk_size=500, max_turns=1000,
+                    writer=None, max_pip=6, hand_size=HAND_SIZE, draw_threshold=None):
+    for name in (strategy_a, strategy_b):
+        if name not in STRATEGIES:
+            raise ValueError(f"Unknown strategy: {name!r}")
+
+    chunks = [(start, min(start + chunk_size, games)) for start in range(0, games, chunk_size)]
+    totals = TournamentResult()
+    record = writer is not None
+
+    def collect(chunk_result):
+        if record:
+            writer.add_encoded(chunk_result.records)
+            chunk_result.records = b''
+        return totals.merge(chunk_result)
+
+    if workers == 1:
+        for start, stop in chunks:
+            yield collect(play_chunk(strategy_a, strategy_b, seed, start, stop, max_turns, record, max_pip, hand_size,
+                                     draw_threshold))
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(play_chunk, strategy_a, strategy_b, seed, start, stop, max_turns, record, max_pip,
+                                   hand_size, draw_threshold)
+                   for start, stop in chunks]
+        for future in as_completed(futures):
+            yield collect(future.result())
+
+
+def run_tournament(strategy_a, strategy_b, games, seed=0, workers=None, chunk_size=500, max_turns=1000,
+                   writer=None, max_pip=6, hand_size=HAND_SIZE, draw_threshold=None):
+    totals = TournamentResult()
+    for totals in iter_tournament(strategy_a, strategy_b, games, seed, workers, chunk_size, max_turns, writer,
+                                  max_pip, hand_size, draw_threshold):
+        pass
+    return totals
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Play a self-play tournament between two computer strategies.")
+    parser.add_argument('strategy_a', choices=sorted(STRATEGIES))
+    parser.add_argument('strategy_b', choices=sorted(STRATEGIES))
+    parser.add_argument('-n', '--games', type=int, default=10000)
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help="number of worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=500)
+    parser.add_argument('--max-turns', type=int, default=1000)
+    parser.add_argument('-q', '--quiet', action='store_true', help="only print the final totals")
+    parser.add_argument('-r', '--record', metavar='PATH', help="write every game to a binary game record file")
+    parser.add_argument('--max-pip', type=int, default=6, help="play with a double-N set (default: double-six)")
+    parser.add_argument('--hand-size', type=int, default=HAND_SIZE)
+    parser.add_argument('--draw-threshold', type=int, default=None,
+                        help="pieces of the end number in the snake that end the game in a draw (default: all)")
+    args = parser.parse_args(argv)
+
+    writer = None
+    if args.record:
+        writer = GameRecordWriter(args.record, tile_set_for(args.max_pip), hand_size=args.hand_size,
+                                  draw_threshold=args.draw_threshold)
+    totals = TournamentResult()
+    try:
+        for totals in iter_tournament(args.strategy_a, args.strategy_b, args.games, args.seed, args.workers,
+                                      args.chunk_size, args.max_turns, writer, args.max_pip, args.hand_size,
+                                      args.draw_threshold):
+            if not args.quiet:
+                print(totals.summary(), flush=True)
+    finally:
+        if writer is not None:
+            writer.close()
+    if args.quiet:
+        print(totals.summary())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+import argparse
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .engine import GameState
+from .evaluation import DEFAULT_WEIGHTS, DEFAULT_WEIGHTS_PATH, FEATURES, move_features, save_weights
+from .mcts import WINNING_SIDE, rollout, sample_determinization
+from .strategies import GreedyStrategy
+from .tournament import game_seed
+
+
+# Estimate the win rate of each move for the side to move by playing every move out in the same sampled deals of the
+# hidden pieces with the rollout policy of the tree search. A draw counts as half a win.
+def estimate_move_values(state, moves, playouts, rng):
+    side = state.status
+    values = [0.0] * len(moves)
+    for _ in range(playouts):
+        determinization = sample_determinization(state, side, rng)
+        for i, move in enumerate(moves):
+            determinization.apply(move)
+            if determinization.is_terminal():
+                winner = WINNING_SIDE.get(determinization.status)
+            else:
+                winner = rollout(determinization)
+            values[i] += 1.0 if winner == side else 0.5 if winner is None else 0.0
+            determinization.undo()
+    return [value / playouts for value in values]
+
+
+# Run in a worker process: play greedy self-play games start to stop - 1 and keep every position where the side to
+# move has a choice between two or more pieces, as (feature rows, move values) pairs. Returns one list per game.
+def collect_positions(seed, start, stop, playouts):
+    strategy = GreedyStrategy()
+    games = []
+    for game_index in range(start, stop):
+        rng = random.Random(game_seed(seed, game_index))
+        state = GameState.deal(rng)
+        positions = []
+        while not state.is_terminal():
+            candidates = move_features(state)
+            if len(candidates) > 1:
+                moves = [move for move, _ in candidates]
+                positions.append(([features for _, features in candidates],
+                                  estimate_move_values(state, moves, playouts, rng)))
+            state.apply(strategy.choose_move(state))
+        games.append(positions)
+    return games
+
+
+# The position pool as padded arrays: features (positions x moves x features), values (positions x moves) and valid
+# (positions x moves), which marks the real moves of each position.
+class PositionPool:
+
+    def __init__(self, positions):
+        moves = max(len(values) for _, values in positions)
+        self.features = np.zeros((len(positions), moves, len(FEATURES)))
+        self.values = np.zeros((len(positions), moves))
+        self.valid = np.zeros((len(positions), moves), dtype=bool)
+        for i, (features, values) in enumerate(positions):
+            self.features[i, :len(values)] = features
+            self.values[i, :len(values)] = values
+            self.valid[i, :len(values)] = True
+
+    def __len__(self):
+        return len(self.values)
+
+    def subset(self, indices):
+        pool = PositionPool.__new__(PositionPool)
+        pool.features = self.features[indices]
+        pool.values = self.values[indices]
+        pool.valid = self.valid[indices]
+        return pool
+
+    # The mean estimated win rate of the moves each candidate weight vector (one per row) would choose, over every
+    # position of the pool at once: one matrix product scores every move of every position for a batch of candidates.
+    # Ties go to the first move, as in WeightedStrategy. Batches bound the size of the positions x moves x candidates
+    # score array.
+    def evaluate(self, weights, batch_size=256):
+        weights = np.atleast_2d(weights)
+        positions, moves, features = self.features.shape
+        rows = self.features.reshape(positions * moves, features)
+        invalid = ~self.valid[:, :, None]
+        results = np.empty(len(weights))
+        for start in range(0, len(weights), batch_size):
+            batch = weights[start:start + batch_size]
+            scores = (rows @ batch.T).reshape(positions, moves, len(batch))
+            scores[np.broadcast_to(invalid, scores.shape)] = -np.inf
+            chosen = scores.argmax(axis=1)
+            results[start:start + batch_size] = np.take_along_axis(self.values, chosen, axis=1).mean(axis=0)
+        return results
+
+    # The mean win rate of always choosing the best move, the most any weights can reach.
+    def best_possible(self):
+        return np.where(self.valid, self.values, -np.inf).max(axis=1).mean()
+
+
+# Fit the weights with the cross-entropy method: every iteration samples candidate weight vectors around the current
+# mean, scores them all on the pool in one batch and moves the mean and spread to the best elite fraction. Only the
+# direction of a weight vector changes the moves it picks, so candidates are scaled to unit length.
+def tune(pool, candidates=2000, iterations=20, elite_fraction=0.05, seed=0, progress=None):
+    rng = np.random.default_rng(seed)
+    mean = np.array(DEFAULT_WEIGHTS, dtype=float)
+    spread = np.ones(len(FEATURES))
+    elites = max(2, int(candidates * elite_fraction))
+    best_weights = mean / np.linalg.norm(mean)
+    best_score = pool.evaluate(best_weights)[0]
+
+    for iteration in range(iterations):
+        weights = rng.normal(mean, spread, size=(candidates, len(FEATURES)))
+        weights[0] = mean
+        weights /= np.maximum(np.linalg.norm(weights, axis=1, keepdims=True), 1e-12)
+        scores = pool.evaluate(weights)
+
+        order = np.argsort(scores)[::-1]
+        if scores[order[0]] > best_score:
+            best_weights, best_score = weights[order[0]], scores[order[0]]
+        elite = weights[order[:elites]]
+        mean = elite.mean(axis=0)
+        spread = elite.std(axis=0) + 0.01
+        if progress is not None:
+            progress(iteration, best_score)
+    return best_weights, best_score
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fit the computer's evaluation weights to self-play positions.")
+    parser.add_argument('-g', '--games', type=int, default=400, help="self-play games to collect positions from")
+    parser.add_argument('--playouts', type=int, default=32, help="sampled deals per position")
+    parser.add_argument('--candidates', type=int, default=2000, help="weight vectors scored per iteration")
+    parser.add_argument('--iterations', type=int, default=20)
+    parser.add_argument('--validation', type=float, default=0.2, help="share of games held out for validation")
+    parser.add_argument('-s', '--seed', type=int, default=0)
+    parser.add_argument('-j', '--workers', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=25)
+    parser.add_argument('-o', '--output', required=True,
+                        help=f"weights file to write; writing {DEFAULT_WEIGHTS_PATH} makes the tuned weights the "
+                             f"default opponent")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    chunks = [(first, min(first + args.chunk_size, args.games)) for first in range(0, args.games, args.chunk_size)]
+    games = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        for chunk in executor.map(collect_positions, [args.seed] * len(chunks), [first for first, _ in chunks],
+                                  [stop for _, stop in chunks], [args.playouts] * len(chunks)):
+            games.extend(chunk)
+    validation_games = int(len(games) * args.validation)
+    validation_positions = sum(len(positions) for positions in games[:validation_games])
+    pool = PositionPool([position for positions in games for position in positions])
+    validation = pool.subset(slice(0, validation_positions))
+    training = pool.subset(slice(validation_positions, None))
+    print(f"positions: {len(training)} training, {len(validation)} validation  "
+          f"collected in {time.perf_counter() - start:.1f} s")
+
+    start = time.perf_counter()
+    weights, _ = tune(training, args.candidates, args.iterations, seed=args.seed,
+                      progress=lambda i, score: print(f"iteration {i + 1}: best training win rate {score:.4f}",
+                                                      flush=True))
+    print(f"tuned in {time.perf_counter() - start:.1f} s")
+
+    for name, subset in (('training', training), ('validation', validation)):
+        if len(subset):
+            default_score, tuned_score = subset.evaluate(np.array([DEFAULT_WEIGHTS, weights]))
+            print(f"{name}: default weights {default_score:.4f}  tuned weights {tuned_score:.4f}  "
+                  f"best possible {subset.best_possible():.4f}")
+    print("weights:", "  ".join(f"{name} {weight:.4f}" for name, weight in zip(FEATURES, weights)))
+    save_weights(args.output, weights)
+
+
+if __name__ == '__main__':
+    main()
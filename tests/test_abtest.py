@@ -0,0 +1,21 @@
+import pytest
+
+from dominoes.abtest import A_BETTER, NOT_BETTER, SequentialTest, iter_comparison
+
+
+# A strategy against itself scores exactly one point in every pair, so the test has no variance to measure and
+# still has to accept that A is not better long before it runs out of pairs.
+@pytest.mark.parametrize('method', ['sprt', 'ci'])
+def test_identical_strategies_are_not_better(method):
+    for test in iter_comparison('greedy', 'greedy', SequentialTest(), method, max_pairs=5000, workers=1):
+        pass
+    assert test.variance() == 0.0
+    assert test.verdict(method) == NOT_BETTER
+    assert test.pairs() <= 1000
+
+
+# Counts of pairs by A's points: 40 pairs won twice by A and 10 split.
+def test_clearly_better_strategy():
+    test = SequentialTest().update([0, 0, 10, 0, 40])
+    assert test.verdict('sprt') == A_BETTER
+    assert test.verdict('ci') == A_BETTER
@@ -0,0 +1,39 @@
+import random
+
+import pytest
+
+from dominoes.engine import COMPUTER, COMPUTER_WINS, PLAYER, PLAYER_WINS, GameState, shuffle_domino_set
+from dominoes.strategies import GreedyStrategy
+from dominoes.tiles import tile_set_for
+from dominoes.tournament import play_game
+
+np = pytest.importorskip('numpy')
+batch = pytest.importorskip('dominoes.batch')
+
+OUTCOMES = {PLAYER_WINS: batch.PLAYER_WON, COMPUTER_WINS: batch.COMPUTER_WON}
+
+
+# The batch simulator plays every seeded deal exactly like greedy self-play on the scalar engine: same result and
+# same number of moves.
+@pytest.mark.parametrize('max_pip', [6, 10])
+def test_batch_matches_scalar_engine(max_pip):
+    tile_set = tile_set_for(max_pip)
+    rng = random.Random(max_pip)
+    deals = []
+    for _ in range(2000):
+        deal = list(range(tile_set.size))
+        shuffle_domino_set(deal, rng)
+        deals.append(deal)
+
+    simulator = batch.BatchSimulator(tile_set)
+    outcomes = []
+    turns = []
+    greedy = GreedyStrategy()
+    for deal in deals:
+        state, moves = play_game(GameState.from_deal(deal, tile_set), {PLAYER: greedy, COMPUTER: greedy})
+        outcomes.append(OUTCOMES.get(state.status, batch.DRAWN))
+        turns.append(moves)
+
+    result = simulator.run(len(deals), np.array(deals))
+    assert result.outcomes.tolist() == outcomes
+    assert result.game_turns.tolist() == turns
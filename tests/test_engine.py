@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from dominoes.engine import GameState
+from dominoes.table import PARTNERSHIPS, TableState
+from dominoes.tiles import tile_set_for
+
+
+# Everything a move can change, copied so that later moves cannot change it.
+def fields(state):
+    board = state.board
+    return {
+        'hands': dict(state.hands),
+        'stock_top': state.stock_top,
+        'ends': (board.left_end, board.right_end),
+        'chain': list(board.chain),
+        'mask': board.mask,
+        'board_pip_counts': list(board.pip_counts),
+        'pip_counts': {side: list(counts) for side, counts in state.pip_counts.items()},
+        'hand_pips': dict(state.hand_pips),
+        'voids': dict(state.voids),
+        'status': state.status,
+        'winner': getattr(state, 'winner', None),
+    }
+
+
+# Play random legal moves to the end of the game, then undo them one at a time; after every undo the state must be
+# exactly what it was before that move.
+def check_undo(state, rng):
+    before = []
+    while not state.is_terminal():
+        before.append(fields(state))
+        state.apply(rng.choice(state.legal_moves()))
+    while before:
+        state.undo()
+        assert fields(state) == before.pop()
+    assert not state.history
+    with pytest.raises(ValueError):
+        state.undo()
+
+
+@pytest.mark.parametrize('max_pip, hand_size, draw_threshold', [(6, 7, None), (6, 5, 4), (9, 9, None)])
+def test_two_seat_undo(max_pip, hand_size, draw_threshold):
+    rng = random.Random(max_pip * 100 + hand_size)
+    tile_set = tile_set_for(max_pip)
+    for _ in range(100):
+        check_undo(GameState.deal(rng, tile_set, hand_size, draw_threshold), rng)
+
+
+@pytest.mark.parametrize('seats, teams', [(2, None), (3, None), (4, None), (4, PARTNERSHIPS)])
+def test_table_undo(seats, teams):
+    rng = random.Random(seats)
+    for _ in range(100):
+        check_undo(TableState.deal(rng, seats, teams=teams), rng)
@@ -0,0 +1,56 @@
+import random
+
+import pytest
+
+from dominoes.engine import PLAYER, GameState
+from dominoes.openings import BookLayout, OpeningBook, evaluate_situation, generate_book
+from dominoes.tiles import DOUBLE_SIX, iter_ids, popcount, tile_set_for
+
+
+@pytest.mark.parametrize('max_pip, hand_size', [(6, 7), (6, 5), (9, 7)])
+def test_index_and_situation_round_trip(max_pip, hand_size):
+    layout = BookLayout(tile_set_for(max_pip), hand_size)
+    rng = random.Random(max_pip * 100 + hand_size)
+    indices = [0, 1, layout.entries - 1] + [rng.randrange(layout.entries) for _ in range(500)]
+    for index in indices:
+        opening_id, hand = layout.situation(index)
+        assert popcount(hand) == hand_size
+        assert all(tile_id < opening_id for tile_id in iter_ids(hand))
+        assert layout.index(opening_id, hand) == index
+
+
+# The replying side's first turn of a deal in the given situation, dealt the way the book evaluates it.
+def reply_state(layout, opening_id, hand):
+    smaller = [tile_id for tile_id in range(opening_id) if not (hand >> tile_id) & 1]
+    opponent_size = layout.hand_size - 1
+    opponent_hand = (1 << opening_id) | sum(1 << tile_id for tile_id in smaller[:opponent_size])
+    state = GameState(hand, opponent_hand, smaller[opponent_size:] + list(range(opening_id + 1, layout.tile_set.size)),
+                      draw_threshold=layout.draw_threshold)
+    state.determine_starting_player()
+    return state
+
+
+# The first situations all open with a piece too small to leave the opener a full hand, so the test starts at the
+# first situation opening with piece 13, the rank of the smallest set of eight pieces below 14.
+def test_lookup_in_a_partial_book(tmp_path):
+    path = tmp_path / 'book.bin'
+    limit = 1400
+    generate_book(path, playouts=4, workers=1, chunk_size=500, limit=limit)
+    book = OpeningBook(path)
+    layout = BookLayout(DOUBLE_SIX)
+
+    found = 0
+    for index in range(1287, 1500):
+        opening_id, hand = layout.situation(index)
+        state = reply_state(layout, opening_id, hand)
+        assert state.status == PLAYER and layout.covers(state)
+        entry = book.lookup(state)
+        if index >= limit:
+            assert entry is None
+            continue
+        # With seed 0 every situation is evaluated with its index as the seed.
+        move, win_rate = evaluate_situation(layout, opening_id, hand, 4, random.Random(index))
+        assert entry == (move, round(win_rate * 254) / 254)
+        assert state.is_legal(entry[0])
+        found += 1
+    assert found == limit - 1287
@@ -0,0 +1,34 @@
+import pytest
+
+from dominoes.engine import GAME_OVER_DRAW
+from dominoes.records import GameRecordReader, GameRecordWriter
+from dominoes.tiles import tile_set_for
+from dominoes.tournament import run_tournament
+
+pytest.importorskip('numpy')
+
+
+# Write the games of a tournament to a record file and replay every one of them: each replay must end with the
+# recorded result. A double-18 set has too many pieces for one byte moves, so its file stores two bytes per move.
+@pytest.mark.parametrize('max_pip, hand_size, draw_threshold, move_width', [
+    (6, 7, None, 1),
+    (9, 9, 6, 1),
+    (18, 7, None, 2),
+])
+def test_replay_matches_recorded_result(tmp_path, max_pip, hand_size, draw_threshold, move_width):
+    path = tmp_path / 'games.rec'
+    games = 200
+    with GameRecordWriter(path, tile_set_for(max_pip), hand_size=hand_size, draw_threshold=draw_threshold) as writer:
+        totals = run_tournament('greedy', 'random', games, seed=max_pip, workers=1, chunk_size=64, writer=writer,
+                                max_pip=max_pip, hand_size=hand_size, draw_threshold=draw_threshold)
+
+    reader = GameRecordReader(path)
+    assert reader.layout.move_width == move_width
+    assert len(reader) == totals.games == games
+    draws = 0
+    for i in range(len(reader)):
+        state = reader.replay(i)
+        assert state.result() == reader.result(i)
+        assert len(state.history) == len(reader.moves(i))
+        draws += state.result() == GAME_OVER_DRAW
+    assert draws == totals.draws
@@ -0,0 +1,65 @@
+import random
+
+import pytest
+
+from dominoes.engine import GAME_OVER_DRAW, WINNER, GameState
+from dominoes.solver import DRAWN, LOSS, WIN, EndgameSolver
+from dominoes.strategies import GreedyStrategy
+from dominoes.tiles import DOUBLE_SIX, tile_set_for
+
+
+# The value of the game for the side to move by plain minimax over the engine's own moves. Like the solver, a side
+# only passes when no piece fits.
+def brute_force(state):
+    side = state.status
+    moves = state.legal_moves()
+    best = LOSS
+    for move in moves[:-1] or moves:
+        state.apply(move)
+        if state.status == GAME_OVER_DRAW:
+            value = DRAWN
+        elif state.is_terminal():
+            value = WIN if state.status == WINNER[side] else LOSS
+        elif state.status == side:
+            value = brute_force(state)
+        else:
+            value = -brute_force(state)
+        state.undo()
+        best = max(best, value)
+        if best == WIN:
+            break
+    return best
+
+
+# Greedy self-play from seeded deals until the stock is empty and at most pieces are left in the two hands.
+def endgames(count, pieces, tile_set=DOUBLE_SIX, hand_size=7, draw_threshold=None, seed=0):
+    rng = random.Random(seed)
+    greedy = GreedyStrategy()
+    found = []
+    while len(found) < count:
+        state = GameState.deal(rng, tile_set, hand_size, draw_threshold)
+        while not state.is_terminal():
+            if state.stock_top == 0 and sum(map(state.hand_size, state.hands)) <= pieces:
+                found.append(state)
+                break
+            state.apply(greedy.choose_move(state))
+    return found
+
+
+@pytest.mark.parametrize('max_pip, hand_size, draw_threshold', [(6, 7, None), (6, 7, 4), (6, 12, 6), (9, 9, None)])
+def test_solver_matches_brute_force(max_pip, hand_size, draw_threshold):
+    tile_set = tile_set_for(max_pip)
+    solver = EndgameSolver(tile_set, draw_threshold=draw_threshold)
+    for state in endgames(60, 10, tile_set, hand_size, draw_threshold):
+        value, move = solver.solve(state)
+        assert value == brute_force(state)
+
+        side = state.status
+        state.apply(move)
+        if state.status == GAME_OVER_DRAW:
+            value_after = DRAWN
+        elif state.is_terminal():
+            value_after = WIN if state.status == WINNER[side] else LOSS
+        else:
+            value_after = brute_force(state) * (1 if state.status == side else -1)
+        assert value_after == value